@@ -1,506 +1,284 @@
-from http.client import HTTPException
-from typing import Dict
-from requests import request
+from typing import Optional
 import streamlit as st
+import streamlit.components.v1 as components
 import json
+import os
 import logging
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from drive_index import DriveIndex, subject_version
+from subject_cache import SubjectCache
+from warm_cache import AccessFrequency, CompressedCache
+from disk_store import DiskStore
+from drive_sync import DriveChangesSyncer
+from drive_client import GOOGLE_DRIVE_FOLDER_ID, DriveClientManager
+from storage import ContentBackend, DriveBackend, FakeDriveBackend, FileTooLargeError, LocalBackend
+from bundle import BundleBackend
+from rate_limit import Backoff, TokenBucket
+from subject_loader import SubjectLoader
+from prefetch import NavigationStats, SpeculativePrefetcher
+from subject_html import CompiledModule, CompiledSubject
+from diagram_store import DiagramStore
+from search_index import SearchHit, SearchIndex, SearchIndexer
+from styles import CUSTOM_CSS
+from content_api import ContentApi
+import math
+import time
+import uuid
+from contextlib import contextmanager
+import telemetry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-GOOGLE_DRIVE_FOLDER_ID="15gnvPIxP4oqFghT1f-3lyciYApL7Qget"
-try:
-    credentials = service_account.Credentials.from_service_account_info(
-        dict(st.secrets["gcp_service_account"]),
-        scopes=["https://www.googleapis.com/auth/drive.readonly"]
-    )
-except Exception as e:
-    st.error(f"Failed to load Google Cloud credentials: {str(e)}")
-    st.stop()
-
-drive_service = build('drive', 'v3', credentials=credentials)
-subject_cache: Dict[str, Dict] = {}
+# "drive" (production), "local" (synced mirror on disk), "fake" (in-process Drive seeded from a local tree)
+# or "bundle" (file written by compile_bundle.py)
+CONTENT_BACKEND = os.environ.get('CONTENT_BACKEND', 'drive')
+CONTENT_LOCAL_DIR = os.environ.get('CONTENT_LOCAL_DIR', 'content')
+CONTENT_BUNDLE_PATH = os.environ.get('CONTENT_BUNDLE_PATH', 'content.bundle')
+FAKE_DRIVE_LATENCY_SECONDS = float(os.environ.get('FAKE_DRIVE_LATENCY_SECONDS', '0'))
+DRIVE_INDEX_TTL_SECONDS = 3600
+LOCAL_INDEX_TTL_SECONDS = 10
+DRIVE_CHANGES_POLL_SECONDS = 30
+# Hot tier: parsed subjects, and their compiled markup, read at least SUBJECT_HOT_MIN_HITS times recently
+SUBJECT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+SUBJECT_HOT_MIN_HITS = 2
+# Warm tier: every subject read, zlib-compressed (budget is compressed bytes)
+SUBJECT_WARM_CACHE_MAX_BYTES = 128 * 1024 * 1024
+SUBJECT_CACHE_TTL_SECONDS = 3600
+SUBJECT_DISK_CACHE_DIR = os.environ.get('SUBJECT_DISK_CACHE_DIR', '.cache/subjects')
+LAZY_DECODE_MIN_BYTES = 2 * 1024 * 1024
+MAX_SUBJECT_FILE_BYTES = 64 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# Shared by every Drive request and download chunk in the process, well under the per-user quota
+DRIVE_REQUESTS_PER_SECOND = 20
+DRIVE_REQUESTS_BURST = 40
+DRIVE_NUM_RETRIES = 5
+SPECULATIVE_PREFETCH_MAX_WORKERS = 2
+TOPICS_PER_PAGE = 5
+SPECULATIVE_PREFETCH_MAX_CANDIDATES = 6
+DIAGRAM_CACHE_DIR = os.environ.get('DIAGRAM_CACHE_DIR', '.cache/diagrams')
+DIAGRAM_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DIAGRAM_THUMBNAIL_WIDTH = 480
+DIAGRAM_FETCH_MAX_WORKERS = 4
+# Longest a module render waits for thumbnails, shared by all its diagrams
+DIAGRAM_WAIT_SECONDS = 1
+SEARCH_INDEX_SYNC_SECONDS = 300
+# Subjects nobody has read yet are downloaded for the search index at this pace, on top of DRIVE_REQUESTS_PER_SECOND
+SEARCH_BACKFILL_SUBJECTS_PER_SECOND = 0.2
+SEARCH_RESULTS_LIMIT = 10
+# Spans as JSON log lines plus Prometheus metrics on 127.0.0.1:METRICS_PORT/metrics (0 = no endpoint)
+TELEMETRY_ENABLED = os.environ.get('TELEMETRY_ENABLED', '') == '1'
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '9464'))
+# Read-only JSON API for other tools over the same caches (0 = off); see content_api.py
+CONTENT_API_PORT = int(os.environ.get('CONTENT_API_PORT', '0'))
+CONTENT_API_HOST = os.environ.get('CONTENT_API_HOST', '127.0.0.1')
 
-def list_drive_folder(folder_id):
-    """List all files in a Google Drive folder"""
+@st.cache_resource
+def get_drive_client() -> DriveClientManager:
+    """Drive client built once per process, with its token kept fresh in the background"""
     try:
-        results = drive_service.files().list(
-            q=f"'{folder_id}' in parents",
-            fields="files(id, name, mimeType)"
-        ).execute()
-        return results.get('files', [])
+        credentials = service_account.Credentials.from_service_account_info(
+            dict(st.secrets["gcp_service_account"]),
+            scopes=["https://www.googleapis.com/auth/drive.readonly"]
+        )
     except Exception as e:
-        logger.error(f"Error listing Drive folder: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error accessing Google Drive")
-    
-def get_file_content(file_id):
-    """Get content of a file from Google Drive"""
-    request = drive_service.files().get_media(fileId=file_id)
-    file_content = request.execute()
-    return file_content
-
-def load_subject_data(department: str, semester: str, subject: str) -> Dict:
-    cache_key = f"{department}_{semester}_{subject}"
-    
-    if cache_key in subject_cache:
-        return subject_cache[cache_key]
-    
-    deptfolders = list_drive_folder(GOOGLE_DRIVE_FOLDER_ID)
-    dept_folder = next((f for f in deptfolders if f['name'] == department and f['mimeType'] == 'application/vnd.google-apps.folder'), None)
-    
-    semester_folders = list_drive_folder(dept_folder['id'])
-    semester_folder = next((f for f in semester_folders if f['name'] == semester and f['mimeType'] == 'application/vnd.google-apps.folder'), None)
-    
-    subject_files = list_drive_folder(semester_folder['id'])
-    subject_file = next((f for f in subject_files if f['name'] == f"{subject}.json"), None)
-    
-    file_content = get_file_content(subject_file['id'])
-    data = json.loads(file_content.decode('utf-8'))
-    subject_cache[cache_key] = data
-    return data
+        st.error(f"Failed to load Google Cloud credentials: {str(e)}")
+        st.stop()
+    client = DriveClientManager(credentials)
+    client.start()
+    return client
+
+@st.cache_resource
+def get_backend() -> ContentBackend:
+    """The content backend selected by CONTENT_BACKEND, built once per process"""
+    if CONTENT_BACKEND == 'local':
+        return LocalBackend(CONTENT_LOCAL_DIR)
+    if CONTENT_BACKEND == 'fake':
+        return FakeDriveBackend.from_directory(CONTENT_LOCAL_DIR, latency=FAKE_DRIVE_LATENCY_SECONDS)
+    if CONTENT_BACKEND == 'bundle':
+        return BundleBackend(CONTENT_BUNDLE_PATH)
+    
+    client = get_drive_client()
+    return DriveBackend(
+        client.service,
+        GOOGLE_DRIVE_FOLDER_ID,
+        connection=client.connection,
+        chunk_size=DOWNLOAD_CHUNK_BYTES,
+        backoff=Backoff(TokenBucket(DRIVE_REQUESTS_PER_SECOND, DRIVE_REQUESTS_BURST), max_retries=DRIVE_NUM_RETRIES)
+    )
+
+@st.cache_resource
+def get_drive_index() -> DriveIndex:
+    """One department/semester/subject index per process, shared by all sessions"""
+    backend = get_backend()
+    ttl = DRIVE_INDEX_TTL_SECONDS if backend.remote else LOCAL_INDEX_TTL_SECONDS
+    return DriveIndex(backend.list_tree, backend.root_id, ttl=ttl)
+
+@st.cache_resource
+def get_subject_cache() -> SubjectCache:
+    """Parsed subjects shared by all sessions, keyed by Drive file id"""
+    return SubjectCache(max_bytes=SUBJECT_CACHE_MAX_BYTES, ttl=SUBJECT_CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def get_warm_cache() -> CompressedCache:
+    """Compressed raw subjects shared by all sessions, evicted by access frequency"""
+    return CompressedCache(AccessFrequency(), max_bytes=SUBJECT_WARM_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_disk_store() -> DiskStore:
+    """Raw subject files kept on local disk across restarts"""
+    return DiskStore(SUBJECT_DISK_CACHE_DIR)
+
+@st.cache_resource
+def get_subject_loader() -> SubjectLoader:
+    """Shared hot → warm → disk store → backend loader"""
+    return SubjectLoader(
+        get_backend(),
+        get_drive_index(),
+        get_subject_cache(),
+        get_disk_store(),
+        lazy_min_bytes=LAZY_DECODE_MIN_BYTES,
+        max_file_bytes=MAX_SUBJECT_FILE_BYTES,
+        warm=get_warm_cache(),
+        hot_min_hits=SUBJECT_HOT_MIN_HITS
+    )
+
+@st.cache_resource
+def get_drive_syncer() -> Optional[DriveChangesSyncer]:
+    """Keep the shared index and caches fresh from the Drive changes feed"""
+    backend = get_backend()
+    if backend.service is None:
+        return None
+    loader = get_subject_loader()
+    indexer = get_search_indexer()
+    
+    def on_change(file_ids):
+        loader.invalidate(file_ids)
+        indexer.request_sync()
+    
+    syncer = DriveChangesSyncer(
+        backend.service,
+        get_drive_index(),
+        interval=DRIVE_CHANGES_POLL_SECONDS,
+        on_change=on_change,
+        execute=backend.execute if isinstance(backend, DriveBackend) else None
+    )
+    syncer.start()
+    return syncer
+
+@st.cache_resource
+def get_search_indexer() -> SearchIndexer:
+    """Full-text index of every subject, fed by loads and kept current from a background thread"""
+    loader = get_subject_loader()
+    indexer = SearchIndexer(
+        SearchIndex(),
+        get_drive_index(),
+        load=loader.peek_file,
+        interval=SEARCH_INDEX_SYNC_SECONDS,
+        cached=loader.contains,
+        backfill=TokenBucket(SEARCH_BACKFILL_SUBJECTS_PER_SECOND, 1) if get_backend().remote else None
+    )
+    loader.on_load = indexer.on_load
+    indexer.start()
+    return indexer
+
+@st.cache_resource
+def setup_telemetry() -> bool:
+    """Enable instrumentation once per process and export the caches' own counters"""
+    telemetry.configure(TELEMETRY_ENABLED, port=METRICS_PORT)
+    if TELEMETRY_ENABLED:
+        telemetry.register_gauges('cache.hot', get_subject_cache().stats)
+        telemetry.register_gauges('cache.warm', get_warm_cache().stats)
+        telemetry.register_gauges('search_index', lambda: get_search_indexer().search_index.stats())
+    return TELEMETRY_ENABLED
+
+@st.cache_resource
+def get_content_api() -> Optional[ContentApi]:
+    """Serve the shared index and subject cache as a JSON API, once per process"""
+    if not CONTENT_API_PORT:
+        return None
+    api = ContentApi(get_subject_loader(), get_drive_index())
+    api.serve(CONTENT_API_HOST, CONTENT_API_PORT)
+    return api
+
+@st.cache_resource
+def get_prefetcher() -> SpeculativePrefetcher:
+    """Background prefetch of likely next subjects, driven by process-wide view counts"""
+    return SpeculativePrefetcher(
+        get_subject_loader(),
+        NavigationStats(),
+        max_workers=SPECULATIVE_PREFETCH_MAX_WORKERS,
+        max_candidates=SPECULATIVE_PREFETCH_MAX_CANDIDATES
+    )
+
+@st.cache_resource
+def get_diagram_store() -> DiagramStore:
+    """Thumbnails of topic/subtopic diagrams, fetched once and shared by all sessions"""
+    return DiagramStore(
+        DIAGRAM_CACHE_DIR,
+        max_bytes=DIAGRAM_CACHE_MAX_BYTES,
+        thumbnail_width=DIAGRAM_THUMBNAIL_WIDTH,
+        max_workers=DIAGRAM_FETCH_MAX_WORKERS
+    )
+
+def load_compiled_subject(department: str, semester: str, subject: str, progress=None) -> CompiledSubject:
+    subject_file = get_drive_index().subject_file(department, semester, subject)
+    if subject_file is None:
+        # Renamed or removed since it was selected
+        st.warning(f"{subject} is no longer available in {department} • {semester}. Please pick another subject.")
+        st.stop()
+    checksum = subject_version(subject_file)
+    # Compiled markup shares the hot tier's budget, and like parsed subjects is kept only
+    # for subjects read often; a hit still counts as a read for the warm tier's eviction
+    loader = get_subject_loader()
+    key = f"compiled:{subject_file['id']}"
+    compiled = loader.cache.get(key, checksum)
+    if compiled is not None:
+        loader.record(subject_file)
+        return compiled
+    subject_data = loader.load_file(subject_file, progress)
+    with telemetry.span('render.compile', checksum=checksum):
+        compiled = CompiledSubject(subject_data)
+    if loader.is_hot(subject_file):
+        loader.cache.put(key, compiled, compiled.nbytes, checksum)
+    return compiled
+
+def get_session_id() -> str:
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def prefetch_next_subjects(department: str, semester: str, subject: str):
+    """Replace this session's queued prefetches with candidates for the new selection"""
+    if st.session_state.get('last_selection') == (department, semester, subject):
+        return
+    st.session_state.last_selection = (department, semester, subject)
+    get_prefetcher().on_select(get_session_id(), department, semester, subject)
+
+def prefetch_semester(department: str, semester: str):
+    """Start fetching every subject of a semester as soon as it is picked"""
+    if st.session_state.get('prefetched_semester') == (department, semester):
+        return
+    st.session_state.prefetched_semester = (department, semester)
+    get_prefetcher().on_semester(get_session_id(), department, semester)
 
 def get_departments():
-    folders = list_drive_folder(GOOGLE_DRIVE_FOLDER_ID)
-    departments = [f['name'] for f in folders if f['mimeType'] == 'application/vnd.google-apps.folder']
-    return departments
+    return get_drive_index().departments()
     
 def get_semesters(department : str):
-    folders = list_drive_folder(GOOGLE_DRIVE_FOLDER_ID)
-    dep_folderids = [f['id'] for f in folders if f['name'] == f'{department}']
-    semester_folders = list_drive_folder(dep_folderids[0])
-    semesters = [f['name'] for f in semester_folders if f['mimeType'] == 'application/vnd.google-apps.folder']
-    return semesters
+    return get_drive_index().semesters(department)
 
 def get_subjects(department : str, semester : str,):
-    folders = list_drive_folder(GOOGLE_DRIVE_FOLDER_ID)
-    dep_folderids = [f['id'] for f in folders if f['name'] == f'{department}']
-    semester_folders = list_drive_folder(dep_folderids[0])
-    semesters = [f['name'] for f in semester_folders if f['mimeType'] == 'application/vnd.google-apps.folder']
-    
-    sem_folderids = [f['id'] for f in semester_folders if f['name'] == f'{semester}']
-    subject_files = list_drive_folder(sem_folderids[0])
-    subjects = [f['name'].replace('.json', '') for f in subject_files if f['name'].endswith('.json')]
-    return subjects
+    return get_drive_index().subjects(department, semester)
 
 # Custom CSS for modern styling
 def load_custom_css():
-    st.markdown("""
-    <style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Global Styles */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        max-width: 1200px;
-    }
-    
-    /* Custom Header */
-    .custom-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        margin-bottom: 2rem;
-        color: white;
-        text-align: center;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-    }
-    
-    .custom-header h1 {
-        font-family: 'Inter', sans-serif;
-        font-weight: 700;
-        font-size: 2.5rem;
-        margin: 0;
-        text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .custom-header p {
-        font-size: 1.1rem;
-        margin: 0.5rem 0 0 0;
-        opacity: 0.9;
-    }
-    
-    /* Legend/Guide Section */
-    .content-guide {
-        background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 100%);
-        border: 2px solid #0284c7;
-        border-radius: 15px;
-        padding: 1.5rem;
-        margin-bottom: 2rem;
-    }
-    
-    .guide-title {
-        color: #0c4a6e;
-        font-size: 1.3rem;
-        font-weight: 700;
-        margin: 0 0 1rem 0;
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-    }
-    
-    .guide-items {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-        gap: 1rem;
-    }
-    
-    .guide-item {
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        padding: 0.75rem;
-        background: white;
-        border-radius: 10px;
-        border-left: 4px solid;
-    }
-    
-    .guide-module {
-        border-left-color: #2563eb;
-    }
-    
-    .guide-topic {
-        border-left-color: #059669;
-    }
-    
-    .guide-subtopic {
-        border-left-color: #dc2626;
-    }
-    
-    .guide-icon {
-        width: 35px;
-        height: 35px;
-        border-radius: 8px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-weight: 600;
-        color: white;
-        font-size: 0.9rem;
-    }
-    
-    .guide-module .guide-icon {
-        background: #2563eb;
-    }
-    
-    .guide-topic .guide-icon {
-        background: #059669;
-        width: 30px;
-        height: 30px;
-        border-radius: 6px;
-        font-size: 0.8rem;
-    }
-    
-    .guide-subtopic .guide-icon {
-        background: #dc2626;
-        width: 25px;
-        height: 25px;
-        border-radius: 4px;
-        font-size: 0.75rem;
-    }
-    
-    .guide-text {
-        flex: 1;
-    }
-    
-    .guide-label {
-        font-weight: 600;
-        color: #1e293b;
-        margin-bottom: 0.25rem;
-    }
-    
-    .guide-description {
-        font-size: 0.85rem;
-        color: #64748b;
-        margin: 0;
-    }
-    
-    /* Sidebar Styling */
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #f8fafc 0%, #e2e8f0 100%);
-        border-radius: 15px;
-        padding: 1.5rem;
-    }
-    
-    /* Subject Info Card */
-    .subject-info-card {
-        background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin-bottom: 2rem;
-        border-left: 5px solid #ff6b35;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-    }
-    
-    .subject-info-card h2 {
-        color: #2d3748;
-        margin: 0 0 0.5rem 0;
-        font-weight: 600;
-    }
-    
-    .subject-path {
-        color: #4a5568;
-        font-size: 0.9rem;
-        opacity: 0.8;
-    }
-    
-    /* Consistent Content Cards */
-    .content-card {
-        background: white;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-bottom: 1.5rem;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-    }
-    
-    /* Module Style */
-    .module-card {
-        border-left: 5px solid #2563eb;
-        background: linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%);
-        cursor: pointer;
-        transition: all 0.3s ease;
-    }
-    
-    .module-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-    }
-    
-    .module-header {
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        width: 100%;
-    }
-    
-    .module-title {
-        font-size: 1.4rem;
-        font-weight: 700;
-        color: #1e40af;
-        margin: 0;
-        display: flex;
-        align-items: center;
-        flex: 1;
-    }
-    
-    .module-number {
-        background: #2563eb;
-        color: white;
-        width: 35px;
-        height: 35px;
-        border-radius: 8px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-weight: 600;
-        margin-right: 1rem;
-        font-size: 0.9rem;
-    }
-    
-    .module-toggle {
-        background: none;
-        border: none;
-        color: #2563eb;
-        font-size: 1.5rem;
-        cursor: pointer;
-        padding: 0.5rem;
-        border-radius: 6px;
-        transition: all 0.2s ease;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        min-width: 40px;
-        height: 40px;
-    }
-    
-    .module-toggle:hover {
-        background: rgba(37, 99, 235, 0.1);
-        transform: scale(1.1);
-    }
-    
-    .module-content {
-        margin-top: 1rem;
-        transition: all 0.3s ease;
-    }
-    
-    .module-content.collapsed {
-        display: none;
-    }
-    
-    .module-summary {
-        margin-top: 0.5rem;
-        font-size: 0.9rem;
-        color: #64748b;
-        font-style: italic;
-    }
-    
-    /* Topic Style */
-    .topic-card {
-        border-left: 4px solid #059669;
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        margin-left: 1rem;
-    }
-    
-    .topic-title {
-        font-size: 1.2rem;
-        font-weight: 600;
-        color: #047857;
-        margin: 0;
-        display: flex;
-        align-items: center;
-    }
-    
-    .topic-number {
-        background: #059669;
-        color: white;
-        width: 30px;
-        height: 30px;
-        border-radius: 6px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-weight: 600;
-        margin-right: 0.75rem;
-        font-size: 0.8rem;
-    }
-    
-    /* Subtopic Style */
-    .subtopic-card {
-        border-left: 3px solid #dc2626;
-        background: linear-gradient(135deg, #fef2f2 0%, #fee2e2 100%);
-        margin-left: 2rem;
-    }
-    
-    .subtopic-title {
-        font-size: 1.1rem;
-        font-weight: 600;
-        color: #b91c1c;
-        margin: 0;
-        display: flex;
-        align-items: center;
-    }
-    
-    .subtopic-number {
-        background: #dc2626;
-        color: white;
-        width: 25px;
-        height: 25px;
-        border-radius: 4px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-weight: 600;
-        margin-right: 0.5rem;
-        font-size: 0.75rem;
-    }
-    
-    /* Image Gallery Styling */
-    .image-gallery {
-        display: grid;
-        grid-template-columns: repeat(3, 1fr);
-        gap: 1rem;
-        margin: 1.5rem 0;
-    }
-    
-    .image-item {
-        background: white;
-        border-radius: 10px;
-        padding: 1rem;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-        text-align: center;
-    }
-    
-    .image-title {
-        font-size: 0.85rem;
-        font-weight: 600;
-        color: #4a5568;
-        margin-bottom: 0.75rem;
-        padding: 0.4rem 0.8rem;
-        background: #f7fafc;
-        border-radius: 5px;
-        display: inline-block;
-    }
-    
-    @media (max-width: 768px) {
-        .image-gallery {
-            grid-template-columns: 1fr;
-        }
-        .guide-items {
-            grid-template-columns: 1fr;
-        }
-    }
-    
-    @media (max-width: 1024px) and (min-width: 769px) {
-        .image-gallery {
-            grid-template-columns: repeat(2, 1fr);
-        }
-    }
-    
-    /* Stats Cards */
-    .stats-container {
-        display: flex;
-        gap: 1rem;
-        margin-bottom: 2rem;
-    }
-    
-    .stat-card {
-        flex: 1;
-        background: white;
-        padding: 1.5rem;
-        border-radius: 12px;
-        text-align: center;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-    }
-    
-    .stat-number {
-        font-size: 2rem;
-        font-weight: 700;
-        color: #4299e1;
-        margin-bottom: 0.25rem;
-    }
-    
-    .stat-label {
-        color: #718096;
-        font-size: 0.9rem;
-        font-weight: 500;
-    }
-    
-    /* Content Text */
-    .content-text {
-        line-height: 1.6;
-        color: #cccccc;
-        margin-bottom: 1rem;
-    }
-    
-    /* Progress Indicator */
-    .progress-bar {
-        height: 4px;
-        background: #e2e8f0;
-        border-radius: 2px;
-        margin: 1rem 0;
-    }
-    
-    .progress-fill {
-        height: 100%;
-        background: linear-gradient(90deg, #4299e1, #38b2ac);
-        border-radius: 2px;
-        transition: width 0.3s ease;
-    }
-    
-    /* Hide Streamlit default elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Page Configuration
+rerun_started = time.perf_counter()
+# False once the run ends; a fragment that reruns on its own still sees this run's globals
+in_full_run = True
 st.set_page_config(
     page_title="Modern Learning Hub",
     page_icon="🎓",
@@ -511,6 +289,12 @@ st.set_page_config(
 # Load custom CSS
 load_custom_css()
 
+# Start telemetry, the background Drive changes syncer, search indexer and content API once per process
+setup_telemetry()
+get_drive_syncer()
+get_search_indexer()
+get_content_api()
+
 
 
 # Content Structure Guide - Always show this
@@ -545,25 +329,160 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Sidebar with modern styling
-with st.sidebar:
+def toggle_module(module_id: str):
+    if module_id in st.session_state.expanded_modules:
+        st.session_state.expanded_modules.discard(module_id)
+    else:
+        st.session_state.expanded_modules.add(module_id)
+
+def show_more_topics(module_id: str, visible: int):
+    st.session_state.visible_topics[module_id] = visible
+
+@contextmanager
+def fragment_telemetry():
+    """Tag a fragment's spans with the selection and time its reruns that skip the rest of the page"""
+    started = time.perf_counter()
+    full_run = in_full_run
+    department, semester, subject = st.session_state.get('selection', (None, None, None))
+    try:
+        with telemetry.tagged(department=department, semester=semester, subject=subject):
+            yield
+    finally:
+        if not full_run:
+            telemetry.observe('app.fragment_rerun', time.perf_counter() - started)
+
+@st.fragment
+def render_module(module: CompiledModule):
+    """One module card with its toggle and visible topics, rerunnable on its own"""
+    with fragment_telemetry(), telemetry.span('render.module', module=module.module_id):
+        _render_module(module)
+
+def _render_module(module: CompiledModule):
+    module_id = module.module_id
+    is_collapsed = module_id not in st.session_state.expanded_modules
+
+    # MODULE HEADER
+    col1, col2 = st.columns([1, 0.1])
+    with col1:
+        st.markdown(module.header_html, unsafe_allow_html=True)
+
+    with col2:
+        # Toggle button - the callback runs before the fragment reruns
+        st.button(
+            "🔽" if not is_collapsed else "🔼",
+            key=f"toggle_{module_id}",
+            help="Click to expand/collapse module",
+            use_container_width=True,
+            on_click=toggle_module,
+            args=(module_id,)
+        )
+
+    # MODULE CONTENT - Only show if not collapsed
+    if not is_collapsed:
+        # TOPICS in this module, up to the number the reader has asked to see
+        topics = module.topics
+        visible = st.session_state.visible_topics.get(module_id, TOPICS_PER_PAGE)
+        
+        # Start fetching every diagram on screen at once, then render thumbnails as they land;
+        # whatever isn't ready by the shared deadline is left for the browser to load
+        diagram_store = get_diagram_store()
+        diagram_deadline = time.monotonic() + DIAGRAM_WAIT_SECONDS
+        diagram_store.prefetch(
+            url for blocks in topics[:visible] for kind, block in blocks if kind == 'diagrams' for _, url in block
+        )
+        
+        for blocks in topics[:visible]:
+            for kind, block in blocks:
+                if kind == 'html':
+                    st.markdown(block, unsafe_allow_html=True)
+                    continue
+                # A row of up to 3 diagrams
+                cols = st.columns(len(block))
+                for col, (title_html, url) in zip(cols, block):
+                    with col:
+                        st.markdown(title_html, unsafe_allow_html=True)
+                        thumbnail = diagram_store.thumbnail(url, deadline=diagram_deadline)
+                        if thumbnail is None:
+                            # Not ready, not fetchable from the server or not an image; let the browser load it
+                            st.image(url, use_container_width=True)
+                        else:
+                            st.image(thumbnail, use_container_width=True)
+                            st.markdown(f"[🔍 Full size]({url})")
+
+        if len(topics) > visible:
+            remaining = len(topics) - visible
+            st.button(
+                f"Show {min(remaining, TOPICS_PER_PAGE)} more of {remaining} remaining topics",
+                key=f"more_{module_id}",
+                on_click=show_more_topics,
+                args=(module_id, visible + TOPICS_PER_PAGE)
+            )
+
+def open_search_hit(hit: SearchHit):
+    """Select the hit's subject in the sidebar and expand its module down to the topic"""
+    # The index may be a sync behind a rename or removal; a selectbox keeps a value it no longer lists
+    if get_drive_index().subject_file(hit.department, hit.semester, hit.subject) is None:
+        st.toast(f"{hit.subject} is no longer available in {hit.department} • {hit.semester}.")
+        return
+    st.session_state.department_select = hit.department
+    st.session_state.semester_select = hit.semester
+    st.session_state.subject_select = hit.subject
+    st.session_state.pending_jump = (f"module_{hit.module_number}", hit.topic_number)
+    st.session_state.search_rerun = True
+
+def render_search():
+    query = st.text_input("🔎 Search", key="search_query", placeholder="Search topics and content")
+    if not query.strip():
+        return
+    search_index = get_search_indexer().search_index
+    hits = search_index.search(query, limit=SEARCH_RESULTS_LIMIT)
+    if not hits:
+        st.caption("No matches" if search_index.stats()['subjects'] else "The search index is still being built")
+        return
+    for i, hit in enumerate(hits):
+        label = f"M{hit.module_number}: {hit.module_title}"
+        if hit.topic_title is not None:
+            label = f"{hit.topic_title} · {label}"
+        st.button(
+            label,
+            key=f"search_hit_{i}",
+            help=f"{hit.department} → {hit.semester} → {hit.subject}",
+            use_container_width=True,
+            on_click=open_search_hit,
+            args=(hit,)
+        )
+
+# Sidebar with modern styling. As a fragment, changing a selectbox only reruns the
+# sidebar; the page reruns when the selected subject actually changes.
+@st.fragment
+def render_sidebar():
+    with fragment_telemetry():
+        _render_sidebar()
+
+def _render_sidebar():
+    render_search()
+    
     st.markdown("### 📋 Course Selection")
     
     department = st.selectbox(
         "🏫 Department",
         get_departments(),
+        key="department_select",
         help="Select your department"
     )
     
     semester = st.selectbox(
         "📅 Semester", 
         get_semesters(department),
+        key="semester_select",
         help="Choose your semester"
     )
+    prefetch_semester(department, semester)
     
     subject = st.selectbox(
         "📚 Subject",
         get_subjects(department, semester),
+        key="subject_select",
         help="Pick your subject"
     )
     
@@ -571,180 +490,132 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📍 Current Selection")
     st.info(f"**{department}** → **{semester}** → **{subject}**")
-
-# Main Content Area
-if subject:
-    # Load subject data
-    with st.spinner("Loading content..."):
-        subject_data = load_subject_data(department, semester, subject)
-    
-    # Subject Info Card
-    st.markdown(f"""
-    <div class="subject-info-card">
-        <h2>📖 {subject}</h2>
-        <div class="subject-path">{department} • {semester}</div>
-    </div>
-    """, unsafe_allow_html=True)
     
-    # Get modules data
-    modules = subject_data.get("content", {}).get("modules", [])
-    
-    # Stats Cards
-    total_topics = sum(len(module.get("topics", [])) for module in modules)
-    total_subtopics = sum(
-        sum(len(topic.get("subtopics", [])) for topic in module.get("topics", []))
-        for module in modules
-    )
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-        <div class="stat-card">
-            <div class="stat-number">{len(modules)}</div>
-            <div class="stat-label">Modules</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
+    selection = (department, semester, subject)
+    changed = 'selection' in st.session_state and st.session_state.selection != selection
+    st.session_state.selection = selection
+    # A search hit in the current subject still needs the page to expand its module
+    if st.session_state.pop('search_rerun', False) or changed:
+        st.rerun()
+
+def apply_deep_link():
+    """Preselect the sidebar from ?dept=&sem=&subject=&module= on a session's first run"""
+    if st.session_state.get('deep_link_applied'):
+        return
+    st.session_state.deep_link_applied = True
+    params = st.query_params
+    department, semester, subject = params.get('dept'), params.get('sem'), params.get('subject')
+    if department not in get_departments():
+        return
+    st.session_state.department_select = department
+    if semester not in get_semesters(department):
+        return
+    st.session_state.semester_select = semester
+    if subject not in get_subjects(department, semester):
+        return
+    st.session_state.subject_select = subject
+    if params.get('module'):
+        st.session_state.pending_jump = (f"module_{params['module']}", None)
+
+def sync_query_params(department: str, semester: str, subject: str):
+    """Keep the address bar a shareable link to the current subject"""
+    params = {'dept': department, 'sem': semester, 'subject': subject}
+    if any(st.query_params.get(key) != value for key, value in params.items()):
+        # A different subject than the link named; its module no longer applies
+        st.query_params.from_dict(params)
+
+def scroll_to_module(module_id: str):
+    # Runs in a same-origin iframe; the module card may render a moment after it
+    components.html(f"""
+    <script>
+    let tries = 0;
+    const scroll = () => {{
+        const el = window.parent.document.getElementById({json.dumps(module_id)});
+        if (el) {{ el.scrollIntoView({{behavior: "smooth", block: "start"}}); }}
+        else if (tries++ < 20) {{ setTimeout(scroll, 100); }}
+    }};
+    scroll();
+    </script>
+    """, height=0)
+
+# Reruns end early on st.rerun() and st.stop(); time those too
+try:
+    apply_deep_link()
+    with st.sidebar:
+        render_sidebar()
+    department, semester, subject = st.session_state.selection
+    if subject:
+        sync_query_params(department, semester, subject)
+    telemetry.set_tags(department=department, semester=semester, subject=subject)
+
+    # Main Content Area
+    if subject:
+        # Load subject data
+        with st.spinner("Loading content..."):
+            progress_area = st.empty()
+        
+            def show_progress(done, total):
+                if total:
+                    progress_area.progress(min(done / total, 1.0), text=f"Downloaded {done // 1024} of {total // 1024} KB")
+        
+            try:
+                with telemetry.span('render.load'):
+                    compiled = load_compiled_subject(department, semester, subject, progress=show_progress)
+            except FileTooLargeError as e:
+                st.error(f"This subject is too large to display (over {e.max_bytes // (1024 * 1024)} MB).")
+                st.stop()
+            progress_area.empty()
+    
+        # Readers usually move on to a sibling or a popular subject next
+        prefetch_next_subjects(department, semester, subject)
+    
+        # Subject Info Card
         st.markdown(f"""
-        <div class="stat-card">
-            <div class="stat-number">{total_topics}</div>
-            <div class="stat-label">Topics</div>
+        <div class="subject-info-card">
+            <h2>📖 {subject}</h2>
+            <div class="subject-path">{department} • {semester}</div>
         </div>
         """, unsafe_allow_html=True)
     
-    with col3:
-        st.markdown(f"""
-        <div class="stat-card">
-            <div class="stat-number">{total_subtopics}</div>
-            <div class="stat-label">Subtopics</div>
+        # Stats Cards
+        col1, col2, col3 = st.columns(3)
+        for col, card_html in zip((col1, col2, col3), compiled.stat_cards):
+            with col:
+                st.markdown(card_html, unsafe_allow_html=True)
+    
+        st.markdown("<br>", unsafe_allow_html=True)
+    
+        # Modules start collapsed; only expanded ones render their topics, a page at a time
+        if st.session_state.get('rendered_subject') != (department, semester, subject):
+            st.session_state.rendered_subject = (department, semester, subject)
+            st.session_state.expanded_modules = set()
+            st.session_state.visible_topics = {}
+    
+        # Opened from a search hit or a link: expand the module with enough topics shown to include the hit
+        jump = st.session_state.pop('pending_jump', None)
+        # The module id may come from a shared link; only jump to a module this subject has
+        if jump is not None and jump[0] in {module.module_id for module in compiled.modules}:
+            module_id, topic_number = jump
+            st.session_state.expanded_modules.add(module_id)
+            scroll_to_module(module_id)
+            if topic_number is not None:
+                pages = math.ceil(topic_number / TOPICS_PER_PAGE)
+                visible = st.session_state.visible_topics.get(module_id, TOPICS_PER_PAGE)
+                st.session_state.visible_topics[module_id] = max(visible, pages * TOPICS_PER_PAGE)
+    
+        # Display Content in Simple Sequential Structure
+        with telemetry.span('render.modules', modules=len(compiled.modules)):
+            for module in compiled.modules:
+                render_module(module)
+
+    else:
+        # Welcome message when no subject is selected
+        st.markdown("""
+        <div style="text-align: center; padding: 3rem; color: #718096;">
+            <h2>👋 Welcome to Modern Learning Hub</h2>
+            <p>Select a department, semester, and subject from the sidebar to get started!</p>
         </div>
         """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Initialize session state for module collapse
-    if 'collapsed_modules' not in st.session_state:
-        st.session_state.collapsed_modules = set()
-    
-    # Display Content in Simple Sequential Structure
-    for module in modules:
-        module_id = f"module_{module['module_number']}"
-        is_collapsed = module_id in st.session_state.collapsed_modules
-        
-        # Count topics and subtopics for summary
-        topic_count = len(module.get("topics", []))
-        subtopic_count = sum(len(topic.get("subtopics", [])) for topic in module.get("topics", []))
-        
-        # MODULE HEADER
-        col1, col2 = st.columns([1, 0.1])
-        with col1:
-            st.markdown(f"""
-            <div class="content-card module-card">
-                <div class="module-header">
-                    <div class="module-title">
-                        <div class="module-number">M{module['module_number']}</div>
-                        {module['module_title']}
-                    </div>
-                </div>
-                <div class="module-summary">
-                    📚 {topic_count} topic{'s' if topic_count != 1 else ''} • 
-                    📋 {subtopic_count} subtopic{'s' if subtopic_count != 1 else ''}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            # Toggle button
-            if st.button(
-                "🔽" if not is_collapsed else "🔼",
-                key=f"toggle_{module_id}",
-                help="Click to expand/collapse module",
-                use_container_width=True
-            ):
-                if is_collapsed:
-                    st.session_state.collapsed_modules.discard(module_id)
-                else:
-                    st.session_state.collapsed_modules.add(module_id)
-                st.rerun()
-        
-        # MODULE CONTENT - Only show if not collapsed
-        if not is_collapsed:
-            # TOPICS in this module
-            topics = module.get("topics", [])
-            for topic_idx, topic in enumerate(topics, 1):
-                # TOPIC
-                st.markdown(f"""
-                <div class="content-card topic-card">
-                    <div class="topic-title">
-                        <div class="topic-number">{topic_idx}</div>
-                        {topic['topic_title']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Topic content
-                topic_content = topic["content"].get("text", "")
-                if topic_content:
-                    st.markdown(f'<div class="content-text" style="margin-left: 1rem; margin-bottom: 1rem;">{topic_content}</div>', unsafe_allow_html=True)
-                
-                # Topic diagrams - 3 per row
-                diagrams = topic["content"].get("diagrams", [])
-                if diagrams:
-                    # Group diagrams in sets of 3
-                    for i in range(0, len(diagrams), 3):
-                        diagram_batch = diagrams[i:i+3]
-                        cols = st.columns(len(diagram_batch))
-                        
-                        for col, (idx, url) in zip(cols, enumerate(diagram_batch, i+1)):
-                            with col:
-                                st.markdown(f"""
-                                <div class="image-item">
-                                    <div class="image-title">📊 Topic Diagram {idx}</div>
-                                </div>
-                                """, unsafe_allow_html=True)
-                                st.image(url, use_container_width=True)
-                
-                # SUBTOPICS for this topic
-                subtopics = topic.get("subtopics", [])
-                for subtopic_idx, subtopic in enumerate(subtopics, 1):
-                    # SUBTOPIC
-                    st.markdown(f"""
-                    <div class="content-card subtopic-card">
-                        <div class="subtopic-title">
-                            <div class="subtopic-number">{subtopic_idx}</div>
-                            {subtopic['subtopic_title']}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Subtopic content
-                    subtopic_content = subtopic["content"].get("text", "")
-                    if subtopic_content:
-                        st.markdown(f'<div class="content-text" style="margin-left: 2rem; margin-bottom: 1rem;">{subtopic_content}</div>', unsafe_allow_html=True)
-                    
-                    # Subtopic diagrams - 3 per row
-                    sub_diagrams = subtopic["content"].get("diagrams", [])
-                    if sub_diagrams:
-                        # Group diagrams in sets of 3
-                        for i in range(0, len(sub_diagrams), 3):
-                            diagram_batch = sub_diagrams[i:i+3]
-                            cols = st.columns(len(diagram_batch))
-                            
-                            for col, (idx, url) in zip(cols, enumerate(diagram_batch, i+1)):
-                                with col:
-                                    st.markdown(f"""
-                                    <div class="image-item">
-                                        <div class="image-title">📈 Subtopic Diagram {idx}</div>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                                    st.image(url, use_container_width=True)
-
-else:
-    # Welcome message when no subject is selected
-    st.markdown("""
-    <div style="text-align: center; padding: 3rem; color: #718096;">
-        <h2>👋 Welcome to Modern Learning Hub</h2>
-        <p>Select a department, semester, and subject from the sidebar to get started!</p>
-    </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+finally:
+    in_full_run = False
+    telemetry.observe('app.rerun', time.perf_counter() - rerun_started)
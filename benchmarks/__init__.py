@@ -0,0 +1 @@
+"""Benchmarks and load harnesses for the data path; run from the repository root."""
@@ -0,0 +1,130 @@
+"""Synthetic subjects and curricula in the app's subject JSON schema.
+
+``generate_subject`` builds one ``{"subject", "content": {"modules": [...]}}``
+document with ``topics[].subtopics[]`` carrying HTML text and diagram URLs;
+``subject_of_size`` scales it to roughly a target file size. Output depends
+only on the arguments and seed, so runs are reproducible.
+"""
+import json
+import os
+import random
+from typing import Dict, Iterator, Optional, Tuple
+
+from fake_drive import FakeDriveService
+
+# Every generated diagram URL starts with this
+DIAGRAM_BASE = "https://example.com/"
+
+_WORDS = (
+    "algorithm array binary cache circuit compiler data digital energy equation field frequency "
+    "function graph heap integral kernel matrix memory network node operator process protocol queue "
+    "resistance signal stack stress system theorem thermal transform tree vector voltage wave"
+).split()
+
+# name -> (target bytes, diagrams per topic); "huge" carries thousands of diagrams
+SIZES: Dict[str, Tuple[int, int]] = {
+    'tiny': (8 * 1024, 0),
+    'small': (100 * 1024, 1),
+    'medium': (1024 * 1024, 1),
+    'large': (5 * 1024 * 1024, 2),
+    'huge': (20 * 1024 * 1024, 3),
+}
+
+
+def _text(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        n = min(words, rng.randint(8, 20))
+        sentence = ' '.join(rng.choice(_WORDS) for _ in range(n))
+        sentences.append(f"<p>{sentence.capitalize()} <b>{rng.choice(_WORDS)}</b>.</p>")
+        words -= n
+    return ''.join(sentences)
+
+
+def _diagrams(rng: random.Random, count: int) -> list:
+    return [f"{DIAGRAM_BASE}diagrams/{rng.randrange(10 ** 6)}.png" for _ in range(count)]
+
+
+def generate_subject(name: str, modules: int = 5, topics: int = 8, subtopics: int = 4,
+                     words: int = 120, diagrams: int = 1, seed: int = 0) -> Dict:
+    """One subject with ``modules`` × ``topics`` × ``subtopics`` entries of about ``words`` words each"""
+    rng = random.Random(f"{name}:{seed}")
+    return {
+        "subject": name,
+        "content": {
+            "modules": [
+                {
+                    "module_number": m,
+                    "module_title": f"Module {m}: {_text(rng, 4)[3:-4]}",
+                    "topics": [
+                        {
+                            "topic_title": ' '.join(rng.choice(_WORDS) for _ in range(4)).title(),
+                            "content": {"text": _text(rng, words), "diagrams": _diagrams(rng, diagrams)},
+                            "subtopics": [
+                                {
+                                    "subtopic_title": ' '.join(rng.choice(_WORDS) for _ in range(3)).title(),
+                                    "content": {"text": _text(rng, words // 2), "diagrams": _diagrams(rng, diagrams // 2)},
+                                }
+                                for _ in range(subtopics)
+                            ],
+                        }
+                        for _ in range(topics)
+                    ],
+                }
+                for m in range(1, modules + 1)
+            ]
+        },
+    }
+
+
+def subject_of_size(name: str, target_bytes: int, diagrams: int = 1, seed: int = 0) -> bytes:
+    """Encoded subject of roughly ``target_bytes``, grown by adding topics to five modules"""
+    probe = json.dumps(generate_subject(name, topics=1, diagrams=diagrams, seed=seed)).encode()
+    topics = max(1, round(target_bytes / len(probe)))
+    return json.dumps(generate_subject(name, topics=topics, diagrams=diagrams, seed=seed)).encode()
+
+
+def curriculum(departments: int = 4, semesters: int = 8, subjects: int = 6,
+               size: str = 'small') -> Iterator[Tuple[str, str, str, bytes]]:
+    """(department, semester, subject, file bytes) for a whole synthetic curriculum"""
+    target, diagrams = SIZES[size]
+    for d in range(departments):
+        for s in range(1, semesters + 1):
+            for j in range(subjects):
+                name = f"SUB{d}{s}{j}"
+                yield f"DEPT{d}", f"S{s}", name, subject_of_size(name, target, diagrams, seed=d * 100 + s)
+
+
+def fake_drive(departments: int = 4, semesters: int = 8, subjects: int = 6, size: str = 'small',
+               latency: float = 0, page_size: int = 100) -> Tuple[FakeDriveService, str]:
+    """A ``FakeDriveService`` seeded with a curriculum; returns it and the root folder id"""
+    service = FakeDriveService(page_size=page_size)
+    root = service.add_folder('root', file_id='root')
+    folders: Dict[Tuple[str, ...], str] = {}
+    for department, semester, subject, raw in curriculum(departments, semesters, subjects, size):
+        if (department,) not in folders:
+            folders[(department,)] = service.add_folder(department, root)
+        if (department, semester) not in folders:
+            folders[(department, semester)] = service.add_folder(semester, folders[(department,)])
+        service.add_file(f"{subject}.json", raw, folders[(department, semester)])
+    service.latency = latency
+    return service, root
+
+
+def write_curriculum(path: str, departments: int = 4, semesters: int = 8, subjects: int = 6,
+                     size: str = 'small', diagram_base: Optional[str] = None) -> int:
+    """Write a curriculum as ``<path>/<department>/<semester>/<subject>.json``; returns the file count.
+
+    With ``diagram_base``, diagram URLs point there instead of ``DIAGRAM_BASE``,
+    e.g. at a local server that answers every path with an image.
+    """
+    count = 0
+    for department, semester, subject, raw in curriculum(departments, semesters, subjects, size):
+        if diagram_base is not None:
+            raw = raw.replace(DIAGRAM_BASE.encode(), diagram_base.encode())
+        folder = os.path.join(path, department, semester)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{subject}.json"), 'wb') as f:
+            f.write(raw)
+        count += 1
+    return count
@@ -0,0 +1,246 @@
+"""Concurrent-session load test of app.py, run headlessly with Streamlit's AppTest.
+
+    python -m benchmarks.load                         # ramp 1 → 100 sessions
+    python -m benchmarks.load --levels 10 50 --latency 0.1
+
+Every simulated session follows a click stream: open the app, pick a
+department, semester and subject, expand a couple of modules, switch to a
+sibling subject and expand one there. All sessions share this process, and
+so share st.cache_resource, as they would on one Streamlit server. The
+content is a synthetic curriculum served through the in-process fake Drive
+(CONTENT_BACKEND=fake) with ``--latency`` seconds per call, and its diagram
+URLs point at a local HTTP server that answers every path with a PNG.
+
+For each concurrency level the harness reports per-interaction latency
+percentiles, Drive calls per session, process CPU time and resident memory.
+Caches stay warm from one level to the next, as on a server that has been
+up for a while; a curriculum larger than the hot tier keeps Drive in play.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from benchmarks.curriculum import write_curriculum
+from fake_drive import FakeDriveService
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+_drive_calls = 0
+_drive_calls_lock = threading.Lock()
+
+
+def _count_drive_calls():
+    """Count every fake Drive call process-wide, whichever backend instance the app built"""
+    original = FakeDriveService._count
+
+    def counting(self, name):
+        global _drive_calls
+        with _drive_calls_lock:
+            _drive_calls += 1
+        return original(self, name)
+    FakeDriveService._count = counting
+
+
+def _share_app_test_state():
+    """Let AppTest runs overlap the way script runs do on one server.
+
+    Each ``AppTest.run`` installs a mock ``Runtime`` singleton and clears it
+    when done, which pulls it from under any run still going in another
+    thread; keep handing out the last one installed instead. Each run also
+    compiles the script afresh, and ``ast.parse`` is not thread-safe on every
+    Python we run on; a server compiles it once, so share one script cache.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    shared = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared[:] = [cls._instance]
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(shared))
+
+    script_cache = ScriptCache()
+    get_bytecode = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, script_path: get_bytecode(script_cache, script_path)
+
+
+class _DiagramHandler(BaseHTTPRequestHandler):
+    body = b''
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_diagrams() -> str:
+    """Start a local server answering every path with one PNG; returns its base URL"""
+    image = io.BytesIO()
+    Image.new('RGB', (1200, 800), (200, 220, 240)).save(image, 'PNG')
+    _DiagramHandler.body = image.getvalue()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _DiagramHandler)
+    threading.Thread(target=server.serve_forever, name='diagram-server', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        # Not Linux: peak rather than current resident size
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_session(seed: int, timeout: float) -> Dict[str, List[float]]:
+    """One reader's click stream; returns seconds per interaction kind"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    timings: Dict[str, List[float]] = defaultdict(list)
+
+    def timed(kind: str, action):
+        start = time.perf_counter()
+        at = action()
+        timings[kind].append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"{kind}: {at.exception[0].message}")
+        return at
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timed('open', at.run)
+
+    for key, kind in (('department_select', 'select_department'), ('semester_select', 'select_semester'),
+                      ('subject_select', 'select_subject')):
+        selectbox = at.selectbox(key=key)
+        timed(kind, lambda: selectbox.select(rng.choice(selectbox.options)).run())
+
+    def expand_modules(count: int):
+        toggles = [b for b in at.button if b.key and b.key.startswith('toggle_')]
+        for button in rng.sample(toggles, min(count, len(toggles))):
+            timed('toggle_module', lambda: at.button(key=button.key).click().run())
+
+    expand_modules(2)
+    subjects = at.selectbox(key='subject_select')
+    others = [s for s in subjects.options if s != subjects.value]
+    if others:
+        timed('switch_subject', lambda: subjects.select(rng.choice(others)).run())
+        expand_modules(1)
+    return timings
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_level(sessions: int, seed: int, timeout: float) -> Dict:
+    calls_before = _drive_calls
+    cpu_before = cpu_seconds()
+    start = time.perf_counter()
+    timings: Dict[str, List[float]] = defaultdict(list)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, seed + i, timeout) for i in range(sessions)]
+        for future in futures:
+            try:
+                for kind, values in future.result().items():
+                    timings[kind].extend(values)
+            except Exception as e:
+                failures += 1
+                print(f"  session failed: {str(e)}", file=sys.stderr)
+    wall = time.perf_counter() - start
+    return {
+        'sessions': sessions,
+        'failures': failures,
+        'wall_s': wall,
+        'cpu_s': cpu_seconds() - cpu_before,
+        'rss_mb': rss_mb(),
+        'drive_calls_per_session': (_drive_calls - calls_before) / sessions,
+        'interactions': {
+            kind: {'n': len(values), 'p50_ms': statistics.median(values) * 1000,
+                   'p95_ms': percentile(values, 0.95) * 1000, 'p99_ms': percentile(values, 0.99) * 1000}
+            for kind, values in timings.items()
+        },
+    }
+
+
+def report(level: Dict):
+    print(f"\n{level['sessions']} concurrent sessions: {level['wall_s']:.1f}s wall, {level['cpu_s']:.1f}s CPU "
+          f"({level['cpu_s'] / level['wall_s']:.0%} of one core), {level['rss_mb']:.0f} MB RSS, "
+          f"{level['drive_calls_per_session']:.1f} Drive calls/session, {level['failures']} failed")
+    print(f"  {'interaction':<18}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, stats in level['interactions'].items():
+        print(f"  {kind:<18}{stats['n']:>6}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 10, 25, 50, 100],
+                        help="concurrent sessions per step of the ramp")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake Drive seconds per call")
+    parser.add_argument('--departments', type=int, default=4)
+    parser.add_argument('--semesters', type=int, default=8)
+    parser.add_argument('--subjects', type=int, default=6)
+    parser.add_argument('--size', default='small', help="subject size, see benchmarks.curriculum.SIZES")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds allowed per script run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="also write results JSON here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='ktu-load-')
+    content = os.path.join(workdir, 'content')
+    files = write_curriculum(content, args.departments, args.semesters, args.subjects, args.size,
+                             diagram_base=serve_diagrams())
+    print(f"{files} synthetic subjects in {content}")
+    os.environ.update({
+        'CONTENT_BACKEND': 'fake',
+        'CONTENT_LOCAL_DIR': content,
+        'FAKE_DRIVE_LATENCY_SECONDS': str(args.latency),
+        'SUBJECT_DISK_CACHE_DIR': os.path.join(workdir, 'subjects'),
+        'DIAGRAM_CACHE_DIR': os.path.join(workdir, 'diagrams'),
+    })
+    _count_drive_calls()
+    _share_app_test_state()
+
+    levels = []
+    for i, sessions in enumerate(args.levels):
+        levels.append(run_level(sessions, args.seed + i * 10000, args.timeout))
+        report(levels[-1])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency': args.latency, 'size': args.size, 'levels': levels}, f, indent=2)
+        print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Benchmark the data path: decode, load through the cache tiers, sidebar listing and HTML render.
+
+    python -m benchmarks.run                      # full suite, tiny → 20 MB subjects
+    python -m benchmarks.run --quick              # smaller sizes and fewer iterations
+    python -m benchmarks.run --save-baseline      # store results as the baseline
+    python -m benchmarks.run --fail-on-regression # exit 1 if p50 regressed past --threshold
+
+Each case reports throughput, p50/p99 latency and the peak memory traced
+during one extra run, and is compared with the stored baseline when present.
+Subjects come from ``benchmarks.curriculum`` and Drive is a
+``FakeDriveService`` with ``--latency`` seconds per call.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.curriculum import SIZES, fake_drive, subject_of_size
+from drive_index import DriveIndex
+from fake_drive import FakeDriveService
+from search_index import SearchIndex
+from storage import FakeDriveBackend
+from subject_cache import SubjectCache
+from subject_decoder import decode_subject
+from subject_html import CompiledSubject
+from subject_loader import SubjectLoader
+from subject_model import Subject
+from warm_cache import AccessFrequency, CompressedCache
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+LAZY_DECODE_MIN_BYTES = 2 * 1024 * 1024  # as in app.py
+
+# A case's setup returns the operation to time, so per-iteration setup is not measured
+Setup = Callable[[], Callable[[], object]]
+
+
+def measure(setup: Setup, iterations: int, bytes_per_op: Optional[int] = None) -> Dict:
+    timings = []
+    for _ in range(iterations):
+        op = setup()
+        gc.collect()
+        start = time.perf_counter()
+        op()
+        timings.append(time.perf_counter() - start)
+
+    op = setup()
+    gc.collect()
+    tracemalloc.start()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    result = {
+        'iterations': iterations,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        'ops_per_s': len(timings) / sum(timings),
+        'peak_mb': peak / (1024 * 1024),
+    }
+    if bytes_per_op:
+        result['mb_per_s'] = bytes_per_op * len(timings) / sum(timings) / (1024 * 1024)
+    return result
+
+
+def loader_for(backend, hot_min_hits: int = 1) -> SubjectLoader:
+    index = DriveIndex(backend.list_tree, backend.root_id, ttl=3600)
+    return SubjectLoader(backend, index, SubjectCache(max_bytes=1 << 40), lazy_min_bytes=LAZY_DECODE_MIN_BYTES,
+                         warm=CompressedCache(AccessFrequency(), max_bytes=1 << 40), hot_min_hits=hot_min_hits)
+
+
+def subject_cases(size: str, iterations: int, latency: float) -> Dict[str, Dict]:
+    target, diagrams = SIZES[size]
+    raw = subject_of_size(size, target, diagrams)
+    results = {}
+
+    results[f"decode.{size}"] = measure(
+        lambda: lambda: Subject.from_dict(decode_subject(raw, LAZY_DECODE_MIN_BYTES)), iterations, len(raw))
+
+    subject = Subject.from_dict(decode_subject(raw))
+
+    def compile_all():
+        compiled = CompiledSubject(subject)
+        for module in compiled.modules:
+            module.topics
+    results[f"render.compile.{size}"] = measure(lambda: compile_all, iterations, len(raw))
+
+    def index_subject():
+        SearchIndex().add_subject(('D', 'S', size), 'v', subject)
+    results[f"search.index.{size}"] = measure(lambda: index_subject, max(1, iterations // 2), len(raw))
+
+    # One subject on a fake Drive; each cold iteration gets fresh caches
+    service = FakeDriveService()
+    root = service.add_folder('root', file_id='root')
+    semester = service.add_folder('S1', service.add_folder('DEPT0', root))
+    service.add_file(f"{size}.json", raw, semester)
+    backend = FakeDriveBackend(service, root, latency=latency)
+    path = ('DEPT0', 'S1', size)
+
+    def cold():
+        loader = loader_for(backend)
+        loader.index.refresh()
+        return lambda: loader.load(*path)
+    results[f"load.cold.{size}"] = measure(cold, iterations, len(raw))
+
+    warm_loader = loader_for(backend, hot_min_hits=10 ** 9)
+    warm_loader.load(*path)
+    results[f"load.warm.{size}"] = measure(lambda: lambda: warm_loader.load(*path), iterations, len(raw))
+
+    hot_loader = loader_for(backend)
+    hot_loader.load(*path)
+    results[f"load.hot.{size}"] = measure(lambda: lambda: hot_loader.load(*path), iterations * 10)
+    return results
+
+
+def sidebar_cases(iterations: int, latency: float) -> Dict[str, Dict]:
+    service, root = fake_drive(departments=8, semesters=8, subjects=8, size='tiny')
+    backend = FakeDriveBackend(service, root, latency=latency)
+
+    def refresh():
+        index = DriveIndex(backend.list_tree, root)
+        return index.refresh
+
+    index = DriveIndex(backend.list_tree, root, ttl=3600)
+    index.refresh()
+
+    def walk():
+        for department in index.departments():
+            for semester in index.semesters(department):
+                index.subjects(department, semester)
+    return {
+        'sidebar.refresh': measure(refresh, iterations),
+        'sidebar.listing': measure(lambda: walk, iterations * 10),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Print results against the baseline; returns the names of regressed cases"""
+    regressions = []
+    print(f"{'case':<28}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'MB/s':>9}{'peak MB':>9}{'vs base':>10}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        delta = ''
+        if base:
+            ratio = r['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1
+            delta = f"{ratio:.2f}x"
+            if ratio > 1 + threshold:
+                delta += ' !'
+                regressions.append(name)
+        mb_per_s = f"{r['mb_per_s']:.1f}" if 'mb_per_s' in r else ''
+        print(f"{name:<28}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['ops_per_s']:>10.1f}"
+              f"{mb_per_s:>9}{r['peak_mb']:>9.1f}{delta:>10}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="tiny to medium subjects, fewer iterations")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), help="subject sizes to run")
+    parser.add_argument('--iterations', type=int, help="timed iterations per case")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake Drive seconds per call")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="write these results as the baseline")
+    parser.add_argument('--output', help="also write results JSON here")
+    parser.add_argument('--threshold', type=float, default=0.2, help="p50 slowdown counted as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (['tiny', 'small', 'medium'] if args.quick else list(SIZES))
+    iterations = args.iterations or (5 if args.quick else 20)
+
+    results: Dict[str, Dict] = {}
+    results.update(sidebar_cases(iterations, args.latency))
+    for size in sizes:
+        # Big subjects take seconds per iteration; keep their share of the run bounded
+        n = iterations if SIZES[size][0] <= 1024 * 1024 else max(3, iterations // 4)
+        results.update(subject_cases(size, n, args.latency))
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'latency': args.latency,
+        'results': results,
+    }
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {path}")
+
+    if regressions:
+        print(f"{len(regressions)} regressed past {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from storage import FOLDER_MIME_TYPE, ContentBackend, ProgressCallback, check_size
+from subject_decoder import LazyModule, decode_lazily, module_counts
+
+# File layout: MAGIC, the raw subject files back to back, the JSON index,
+# then the index offset as a little-endian uint64 and MAGIC again.
+MAGIC = b'KTUBNDL1'
+_FOOTER = struct.Struct('<Q8s')
+FORMAT_VERSION = 1
+
+
+class BundleEntry(NamedTuple):
+    department: str
+    semester: str
+    subject: str
+    file_id: str
+    modified_time: Optional[str]
+    raw: bytes
+
+
+class BundleFormatError(Exception):
+    pass
+
+
+def validate_subject(data) -> List[str]:
+    """Problems that would stop a subject from rendering; empty when it is fine"""
+    if not isinstance(data, dict) or not isinstance(data.get('content'), dict):
+        return ["missing 'content' object"]
+    modules = data['content'].get('modules')
+    if not isinstance(modules, list):
+        return ["'content.modules' is not a list"]
+
+    problems = []
+    for m, module in enumerate(modules, 1):
+        where = f"module {m}"
+        if not isinstance(module, dict):
+            problems.append(f"{where} is not an object")
+            continue
+        for key in ('module_number', 'module_title'):
+            if key not in module:
+                problems.append(f"{where} has no '{key}'")
+        topics = module.get('topics', [])
+        if not isinstance(topics, list):
+            problems.append(f"{where} 'topics' is not a list")
+            continue
+        for t, topic in enumerate(topics, 1):
+            problems.extend(_validate_entry(topic, 'topic_title', f"{where} topic {t}"))
+            subtopics = topic.get('subtopics', []) if isinstance(topic, dict) else []
+            if not isinstance(subtopics, list):
+                problems.append(f"{where} topic {t} 'subtopics' is not a list")
+                continue
+            for s, subtopic in enumerate(subtopics, 1):
+                problems.extend(_validate_entry(subtopic, 'subtopic_title', f"{where} topic {t} subtopic {s}"))
+    return problems
+
+
+def _validate_entry(entry, title_key: str, where: str) -> List[str]:
+    if not isinstance(entry, dict):
+        return [f"{where} is not an object"]
+    problems = []
+    if not isinstance(entry.get(title_key), str):
+        problems.append(f"{where} has no '{title_key}'")
+    content = entry.get('content')
+    if not isinstance(content, dict):
+        problems.append(f"{where} has no 'content' object")
+        return problems
+    if not isinstance(content.get('text', ''), str):
+        problems.append(f"{where} 'content.text' is not a string")
+    diagrams = content.get('diagrams', [])
+    if not isinstance(diagrams, list) or not all(isinstance(url, str) for url in diagrams):
+        problems.append(f"{where} 'content.diagrams' is not a list of URLs")
+    return problems
+
+
+def write_bundle(path: str, entries: Iterable[BundleEntry], source: str = '') -> int:
+    """Write subjects to a bundle at ``path`` atomically; returns the number written.
+
+    Every entry must already be a valid subject (see ``validate_subject``).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    subjects = []
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            offset = len(MAGIC)
+            for entry in entries:
+                subjects.append(_index_entry(entry, offset))
+                f.write(entry.raw)
+                offset += len(entry.raw)
+            index = json.dumps({'version': FORMAT_VERSION, 'source': source, 'subjects': subjects},
+                               ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            f.write(index)
+            f.write(_FOOTER.pack(offset, MAGIC))
+        # Readable by every worker process, like a normally created file
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(subjects)
+
+
+def _index_entry(entry: BundleEntry, offset: int) -> Dict:
+    data = decode_lazily(entry.raw)
+    modules = []
+    for module in data['content']['modules']:
+        topic_count, subtopic_count = module_counts(module)
+        if isinstance(module, LazyModule):
+            start, end = module.topics_span
+            modules.append({'header': module.header, 'topics': [offset + start, offset + end],
+                            'counts': [topic_count, subtopic_count]})
+        else:
+            # No 'topics' key at all; nothing to defer
+            modules.append({'header': dict(module), 'topics': None, 'counts': [topic_count, subtopic_count]})
+    del data['content']['modules']
+    return {
+        'path': [entry.department, entry.semester, entry.subject],
+        'id': entry.file_id,
+        'modifiedTime': entry.modified_time,
+        'md5Checksum': hashlib.md5(entry.raw).hexdigest(),
+        'span': [offset, offset + len(entry.raw)],
+        'data': data,
+        'modules': modules,
+    }
+
+
+class Bundle:
+    """Read-only view of a bundle file through ``mmap``.
+
+    Only the index is parsed on open. A subject is rebuilt from its indexed
+    skeleton with ``LazyModule``s pointing into the mapping, so a module's
+    topics are decoded straight from the page cache the first time they are
+    read, and processes serving the same bundle share those pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < len(MAGIC) + _FOOTER.size or self._mm[:len(MAGIC)] != MAGIC:
+            raise BundleFormatError(f"{path} is not a subject bundle")
+        index_offset, magic = _FOOTER.unpack(self._mm[-_FOOTER.size:])
+        if magic != MAGIC:
+            raise BundleFormatError(f"{path} is truncated")
+        index = json.loads(self._mm[index_offset:len(self._mm) - _FOOTER.size])
+        if index.get('version') != FORMAT_VERSION:
+            raise BundleFormatError(f"{path} has unsupported version {index.get('version')}")
+        self.source = index.get('source', '')
+        self._subjects: Dict[str, Dict] = {s['id']: s for s in index['subjects']}
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def entries(self) -> List[Dict]:
+        """Index entries: ``path``, ``id``, ``modifiedTime``, ``md5Checksum`` and more"""
+        return list(self._subjects.values())
+
+    def raw(self, file_id: str) -> bytes:
+        start, end = self._subjects[file_id]['span']
+        return self._mm[start:end]
+
+    def size(self, file_id: str) -> int:
+        start, end = self._subjects[file_id]['span']
+        return end - start
+
+    def subject(self, file_id: str) -> Dict:
+        entry = self._subjects[file_id]
+        data = dict(entry['data'])
+        data['content'] = dict(data['content'])
+        modules = []
+        for module in entry['modules']:
+            if module['topics'] is None:
+                modules.append(dict(module['header']))
+            else:
+                modules.append(LazyModule(self._mm, dict(module['header']), tuple(module['topics']), *module['counts']))
+        data['content']['modules'] = modules
+        return data
+
+    def close(self):
+        self._mm.close()
+
+
+class BundleBackend(ContentBackend):
+    """Serves the department/semester/subject tree from a compiled bundle, with no Drive calls.
+
+    Folder ids are synthesized from the path; subject files keep their Drive
+    ids, so cache keys and checksums match what a Drive backend would use.
+    """
+
+    remote = False
+
+    def __init__(self, path: str):
+        self.bundle = Bundle(path)
+        self.root_id = 'bundle'
+
+    def list_tree(self) -> List[Dict]:
+        records = {}
+        for entry in self.bundle.entries():
+            department, semester, subject = entry['path']
+            dept_id = f"bundle/{department}"
+            sem_id = f"{dept_id}/{semester}"
+            records[dept_id] = self._record(dept_id, department, FOLDER_MIME_TYPE, self.root_id)
+            records[sem_id] = self._record(sem_id, semester, FOLDER_MIME_TYPE, dept_id)
+            records[entry['id']] = dict(
+                self._record(entry['id'], f"{subject}.json", 'application/json', sem_id),
+                modifiedTime=entry['modifiedTime'],
+                md5Checksum=entry['md5Checksum'],
+            )
+        return list(records.values())
+
+    @staticmethod
+    def _record(file_id: str, name: str, mime_type: str, parent: str) -> Dict:
+        return {'id': file_id, 'name': name, 'mimeType': mime_type, 'parents': [parent],
+                'modifiedTime': None, 'md5Checksum': None}
+
+    def get_file_content(self, file_id: str, max_bytes: Optional[int] = None,
+                         progress: Optional[ProgressCallback] = None) -> bytes:
+        check_size(file_id, self.bundle.size(file_id), max_bytes)
+        content = self.bundle.raw(file_id)
+        if progress is not None:
+            progress(len(content), len(content))
+        return content
+
+    def open_subject(self, file_id: str) -> Optional[Dict]:
+        return self.bundle.subject(file_id)
@@ -0,0 +1,113 @@
+"""Compile the Drive content tree into a single memory-mappable bundle.
+
+    python compile_bundle.py --output content.bundle
+    python compile_bundle.py --local content --output content.bundle
+
+Every subject is downloaded, validated and written with its module index,
+so the app can serve from the bundle (CONTENT_BACKEND=bundle) without
+parsing subjects up front or calling Drive at all.
+"""
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import toml
+from google.oauth2 import service_account
+
+from bundle import BundleEntry, validate_subject, write_bundle
+from drive_client import GOOGLE_DRIVE_FOLDER_ID, DriveClientManager
+from drive_index import DriveIndex
+from storage import ContentBackend, DriveBackend, LocalBackend
+from subject_decoder import loads
+
+logger = logging.getLogger('compile_bundle')
+
+DEFAULT_SECRETS = '.streamlit/secrets.toml'
+
+
+def drive_backend(folder_id: str, secrets_path: str) -> DriveBackend:
+    credentials = service_account.Credentials.from_service_account_info(
+        toml.load(secrets_path)["gcp_service_account"],
+        scopes=["https://www.googleapis.com/auth/drive.readonly"]
+    )
+    client = DriveClientManager(credentials)
+    return DriveBackend(client.service, folder_id, connection=client.connection)
+
+
+def subject_files(index: DriveIndex) -> List[Tuple[str, str, str, Dict]]:
+    return [
+        (department, semester, subject, index.subject_file(department, semester, subject))
+        for department in index.departments()
+        for semester in index.semesters(department)
+        for subject in index.subjects(department, semester)
+    ]
+
+
+def crawl(backend: ContentBackend, workers: int, max_bytes: Optional[int]) -> Iterator[Tuple[Tuple[str, str, str], Dict, Optional[bytes], List[str]]]:
+    """(path, file record, raw bytes or None, problems) for every subject, in tree order"""
+    index = DriveIndex(backend.list_tree, backend.root_id)
+    index.refresh()
+    files = subject_files(index)
+
+    def fetch(item):
+        department, semester, subject, subject_file = item
+        path = (department, semester, subject)
+        try:
+            raw = backend.get_file_content(subject_file['id'], max_bytes)
+            problems = validate_subject(loads(raw))
+        except Exception as e:
+            return path, subject_file, None, [str(e)]
+        return path, subject_file, raw, problems
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fetch, files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='content.bundle', help="bundle file to write")
+    parser.add_argument('--folder-id', default=GOOGLE_DRIVE_FOLDER_ID, help="Drive folder holding the departments")
+    parser.add_argument('--secrets', default=DEFAULT_SECRETS, help="secrets.toml with [gcp_service_account]")
+    parser.add_argument('--local', metavar='DIR', help="compile a local mirror instead of Drive")
+    parser.add_argument('--workers', type=int, default=8, help="parallel downloads")
+    parser.add_argument('--max-file-mb', type=int, default=64, help="refuse subject files larger than this")
+    parser.add_argument('--strict', action='store_true', help="fail instead of skipping invalid subjects")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    if args.local:
+        backend = LocalBackend(args.local)
+        source = f"local:{args.local}"
+    else:
+        backend = drive_backend(args.folder_id, args.secrets)
+        source = f"drive:{args.folder_id}"
+
+    invalid = []
+
+    def valid_entries() -> Iterator[BundleEntry]:
+        for path, subject_file, raw, problems in crawl(backend, args.workers, args.max_file_mb * 1024 * 1024):
+            if problems:
+                invalid.append(path)
+                for problem in problems:
+                    logger.error(f"{'/'.join(path)}: {problem}")
+                continue
+            yield BundleEntry(*path, subject_file['id'], subject_file['modifiedTime'], raw)
+
+    if args.strict:
+        # Check everything before writing anything
+        entries = list(valid_entries())
+        if invalid:
+            logger.error(f"{len(invalid)} invalid subjects; bundle not written")
+            return 1
+    else:
+        entries = valid_entries()
+
+    written = write_bundle(args.output, entries, source=source)
+    logger.info(f"Wrote {written} subjects to {args.output}" + (f", skipped {len(invalid)} invalid" if invalid else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
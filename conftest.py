@@ -0,0 +1 @@
+"""Lets tests under tests/ import the app's root modules."""
@@ -0,0 +1,243 @@
+"""Read-only JSON API over the app's shared subject cache.
+
+    GET /api/departments
+    GET /api/departments/<department>/semesters
+    GET /api/departments/<department>/semesters/<semester>/subjects
+    GET /api/departments/<department>/semesters/<semester>/subjects/<subject>
+    GET /api/departments/<department>/semesters/<semester>/subjects/<subject>/modules/<number>
+
+Names are URL-encoded path segments, as listed by the level above. Subjects
+are read through the app's ``SubjectLoader``, so every client shares one warm
+cache and one Drive quota, and are returned in the subject file schema.
+
+Every 200 carries a strong ETag and ``Cache-Control: no-cache``, so clients
+revalidate with If-None-Match and get a 304 while nothing changed. Subject
+and module ETags follow the Drive version of the file, so a 304 costs no
+load at all. Bodies of ``COMPRESS_MIN_BYTES`` or more are gzipped for
+clients that accept it, under their own ETag. A whole subject is served as
+the stored file itself, byte for byte.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import telemetry
+from drive_index import DriveIndex, subject_version
+from storage import FileTooLargeError
+from subject_cache import SubjectCache
+from subject_loader import SubjectLoader
+
+logger = logging.getLogger(__name__)
+
+# Bump when the response shape changes, so clients' cached ETags stop matching
+API_VERSION = '2'
+COMPRESS_MIN_BYTES = 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    __slots__ = ('body', 'etag', 'gzip_body')
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.gzip_body = gzip.compress(body, 6) if len(body) >= COMPRESS_MIN_BYTES else None
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.md5('\0'.join((API_VERSION,) + parts).encode('utf-8')).hexdigest()
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _matching_etag(if_none_match: str, etags: Tuple[str, ...]) -> Optional[str]:
+    """The first of ``etags`` that If-None-Match matches, using its weak comparison"""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return etags[0]
+        if tag.removeprefix('W/') in etags:
+            return tag.removeprefix('W/')
+    return None
+
+
+def _gzip_etag(etag: str) -> str:
+    return etag[:-1] + '-gzip"'
+
+
+class ContentApi:
+    """Routes API requests to the shared index and loader, keeping recent encoded responses.
+
+    Encoding a large subject costs more than loading it from the hot tier,
+    so up to ``max_response_bytes`` of encoded subject and module responses
+    are kept, each under its file's version.
+    """
+
+    def __init__(self, loader: SubjectLoader, index: DriveIndex, max_response_bytes: int = 32 * 1024 * 1024):
+        self.loader = loader
+        self.index = index
+        self._responses = SubjectCache(max_bytes=max_response_bytes)
+        # key -> (version, whether its body is gzipped), outliving evicted responses
+        # so a revalidation is still answered without loading the file
+        self._gzipped: Dict[str, Tuple[str, bool]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def serve(self, host: str, port: int):
+        """Serve the API from a background thread"""
+        if self._server is not None:
+            return
+        api = self
+
+        class Handler(_ApiHandler):
+            content_api = api
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # Another worker process on this host already serves the port
+            logger.error(f"Error starting content API on {host}:{port}: {str(e)}")
+            return
+        threading.Thread(target=self._server.serve_forever, name='content-api', daemon=True).start()
+        logger.info(f"Serving content API on http://{host}:{port}/api/departments")
+
+    def respond(self, path: str, if_none_match: str = '', accept_encoding: str = '') -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, body) for a GET of ``path``; raises ApiError"""
+        segments = [unquote(segment) for segment in urlsplit(path).path.strip('/').split('/')]
+        key = '/'.join(segments)
+        route, version, build = self._route(segments)
+        accepts_gzip = _accepts_gzip(accept_encoding)
+        if version is not None and if_none_match:
+            # Versioned responses are validated before anything is loaded, against
+            # the variant this client would get; unknown until the body was built once
+            known_version, gzipped = self._gzipped.get(key, (None, False))
+            if known_version == version or not accepts_gzip:
+                etag = f'"{_digest(version, key)}"'
+                if accepts_gzip and gzipped:
+                    etag = _gzip_etag(etag)
+                if _matching_etag(if_none_match, (etag,)) is not None:
+                    return 304, self._headers(etag), b''
+
+        with telemetry.span('api.request', route=route):
+            response = self._responses.get(key, version) if version is not None else None
+            if response is None:
+                body = build()
+                etag = _digest(version, key) if version is not None else _digest(hashlib.md5(body).hexdigest())
+                response = Response(body, f'"{etag}"')
+                if version is not None:
+                    self._responses.put(key, response, len(body) + len(response.gzip_body or b''), version)
+                    self._gzipped[key] = (version, response.gzip_body is not None)
+
+        if response.gzip_body is not None and accepts_gzip:
+            body, etag = response.gzip_body, _gzip_etag(response.etag)
+        else:
+            body, etag = response.body, response.etag
+        if if_none_match and _matching_etag(if_none_match, (etag,)) is not None:
+            return 304, self._headers(etag), b''
+        headers = self._headers(etag)
+        if body is response.gzip_body:
+            headers['Content-Encoding'] = 'gzip'
+        return 200, headers, body
+
+    def _headers(self, etag: str) -> Dict[str, str]:
+        return {
+            'Content-Type': 'application/json; charset=utf-8',
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+            'Access-Control-Allow-Origin': '*',
+        }
+
+    def _route(self, segments: List[str]) -> Tuple[str, Optional[str], Callable[[], bytes]]:
+        """(route name, file version or None for listings, body builder); raises ApiError"""
+        if segments[:2] != ['api', 'departments']:
+            raise ApiError(404, "Not found")
+        rest = segments[2:]
+        if not rest:
+            return 'departments', None, lambda: _encode({'departments': self.index.departments()})
+
+        department = rest[0]
+        if department not in self.index.departments():
+            raise ApiError(404, f"No department {department!r}")
+        if rest[1:] == ['semesters']:
+            return 'semesters', None, lambda: _encode({'semesters': self.index.semesters(department)})
+
+        if len(rest) < 4 or rest[1] != 'semesters' or rest[3] != 'subjects':
+            raise ApiError(404, "Not found")
+        semester = rest[2]
+        if semester not in self.index.semesters(department):
+            raise ApiError(404, f"No semester {semester!r} in {department!r}")
+        if len(rest) == 4:
+            return 'subjects', None, lambda: _encode({'subjects': self.index.subjects(department, semester)})
+
+        subject = rest[4]
+        subject_file = self.index.subject_file(department, semester, subject)
+        if subject_file is None:
+            raise ApiError(404, f"No subject {subject!r} in {department}/{semester}")
+        version = subject_version(subject_file)
+        if len(rest) == 5:
+            return 'subject', version, lambda: self.loader.read_bytes(subject_file)
+
+        if len(rest) != 7 or rest[5] != 'modules':
+            raise ApiError(404, "Not found")
+        number = rest[6]
+
+        def module():
+            for candidate in self.loader.load_file(subject_file).modules:
+                if str(candidate.number) == number:
+                    return _encode(candidate.to_dict())
+            raise ApiError(404, f"No module {number!r} in {department}/{semester}/{subject}")
+        return 'module', version, module
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    content_api: ContentApi
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        try:
+            status, headers, body = self.content_api.respond(
+                self.path, self.headers.get('If-None-Match', ''), self.headers.get('Accept-Encoding', ''))
+        except ApiError as e:
+            status, headers, body = e.status, {}, _encode({'error': str(e)})
+        except FileTooLargeError as e:
+            status, headers, body = 413, {}, _encode({'error': f"Subject is over {e.max_bytes // (1024 * 1024)} MB"})
+        except Exception as e:
+            logger.error(f"Error serving {self.path}: {str(e)}")
+            status, headers, body = 502, {}, _encode({'error': "Content unavailable"})
+        headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        telemetry.count(f"api.status.{status}")
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
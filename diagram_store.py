@@ -0,0 +1,209 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# What st.image can show; anything else (e.g. a Drive sign-in page) is not stored
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg')
+# Only remote diagrams are fetched; urlopen would also read file:// and other local URLs
+_URL_SCHEMES = ('http://', 'https://')
+
+
+class DiagramStore:
+    """Local, content-addressed thumbnails of diagram images.
+
+    Each http(s) URL is downloaded once on a bounded pool and a
+    ``thumbnail_width`` wide thumbnail is stored under the SHA-256 of the
+    original's bytes, so the same picture linked from many topics is kept
+    once. A small ref file maps the URL to its thumbnail so the mapping
+    survives restarts; the original is not kept, as "Full size" links to the
+    URL itself. When thumbnails exceed ``max_bytes`` the least recently used
+    are deleted. A URL that fails to download or isn't an image is not tried
+    again for ``failure_ttl`` seconds.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, thumbnail_width: int = 480,
+                 max_workers: int = 4, timeout: float = 10, max_image_bytes: int = 20 * 1024 * 1024,
+                 failure_ttl: float = 600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.thumbnail_width = thumbnail_width
+        self.timeout = timeout
+        self.max_image_bytes = max_image_bytes
+        self.failure_ttl = failure_ttl
+        for sub in ('thumbs', 'refs'):
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='diagram-fetch')
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        # url -> time.monotonic() of its last failed fetch
+        self._failures: Dict[str, float] = {}
+        self._bytes = sum(os.path.getsize(path) for path in self._stored_files())
+
+    def cached_thumbnail(self, url: str) -> Optional[str]:
+        """Path of the URL's thumbnail if it is already stored, else None"""
+        if not url.startswith(_URL_SCHEMES):
+            return None
+        try:
+            with open(self._ref_path(url), 'r', encoding='utf-8') as f:
+                path = os.path.join(self.directory, 'thumbs', f.read().strip())
+            if not path.endswith(_IMAGE_EXTENSIONS):
+                # Stored before non-images were refused
+                return None
+            os.utime(path)  # mark as recently used for eviction
+            return path
+        except OSError:
+            return None
+
+    def prefetch(self, urls: Iterable[str]) -> List[Future]:
+        """Start downloading every URL that is not stored yet"""
+        futures = (self._submit(url) for url in urls
+                   if url.startswith(_URL_SCHEMES) and self.cached_thumbnail(url) is None)
+        return [future for future in futures if future is not None]
+
+    def thumbnail(self, url: str, deadline: float = 0) -> Optional[str]:
+        """Thumbnail path, waiting for a download until ``deadline`` (``time.monotonic()``); None if not ready.
+
+        Give every diagram of one render the same deadline, so a slow host
+        delays the render once rather than once per diagram.
+        """
+        path = self.cached_thumbnail(url)
+        if path is not None or not url.startswith(_URL_SCHEMES):
+            return path
+        future = self._submit(url)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            return None
+        except Exception:
+            # Logged once by _done
+            return None
+
+    def _submit(self, url: str) -> Optional[Future]:
+        """The URL's download, started if needed; None while a recent failure is remembered"""
+        with self._lock:
+            failed_at = self._failures.get(url)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < self.failure_ttl:
+                    return None
+                del self._failures[url]
+            future = self._inflight.get(url)
+            if future is not None:
+                return future
+            future = self._pool.submit(self._fetch, url)
+            self._inflight[url] = future
+        future.add_done_callback(lambda done: self._done(url, done))
+        return future
+
+    def _done(self, url: str, future: Future):
+        error = future.exception()
+        with self._lock:
+            self._inflight.pop(url, None)
+            if error is not None:
+                self._failures[url] = time.monotonic()
+        if error is not None:
+            logger.error(f"Error fetching diagram {url}: {str(error)}")
+
+    def _fetch(self, url: str) -> str:
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            content_type = response.headers.get_content_type()
+            content = response.read(self.max_image_bytes + 1)
+        if len(content) > self.max_image_bytes:
+            raise ValueError(f"diagram larger than {self.max_image_bytes} bytes")
+        if not content_type.startswith('image/') and not _is_svg(content):
+            raise ValueError(f"not an image ({content_type})")
+
+        # Decode before storing anything, so a page served in place of an image leaves no trace
+        thumbnail, extension = self._make_thumbnail(content)
+        digest = hashlib.sha256(content).hexdigest()
+        thumb_name = f"{digest}_{self.thumbnail_width}{extension}"
+        thumb_path = os.path.join(self.directory, 'thumbs', thumb_name)
+        if not os.path.exists(thumb_path):
+            self._write(thumb_path, thumbnail)
+        self._write(self._ref_path(url), thumb_name.encode('ascii'), count=False)
+        self._evict()
+        return thumb_path
+
+    def _make_thumbnail(self, content: bytes):
+        """(thumbnail bytes, file extension) for an image; raises ValueError if it isn't one"""
+        if _is_svg(content):
+            # Vector art scales itself
+            return content, '.svg'
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                if image.width <= self.thumbnail_width and f".{image.format.lower()}" in _IMAGE_EXTENSIONS:
+                    return content, f".{image.format.lower()}"
+                image.thumbnail((self.thumbnail_width, image.height))
+                out = io.BytesIO()
+                if image.mode in ('RGBA', 'LA', 'P'):
+                    image.save(out, format='PNG', optimize=True)
+                    return out.getvalue(), '.png'
+                image.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+                return out.getvalue(), '.jpg'
+        except (OSError, SyntaxError) as e:
+            # Served as image/* but not something Pillow can decode
+            raise ValueError(f"unreadable image: {str(e)}")
+
+    def _ref_path(self, url: str) -> str:
+        return os.path.join(self.directory, 'refs', hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _stored_files(self) -> List[str]:
+        paths = []
+        # blobs/ holds originals kept by older versions; they go first, being least recently used
+        for sub in ('blobs', 'thumbs'):
+            folder = os.path.join(self.directory, sub)
+            if os.path.isdir(folder):
+                paths.extend(os.path.join(folder, name) for name in os.listdir(folder))
+        return paths
+
+    def _write(self, path: str, content: bytes, count: bool = True):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        if count:
+            with self._lock:
+                self._bytes += len(content)
+
+    def _evict(self):
+        with self._lock:
+            if self._bytes <= self.max_bytes:
+                return
+            files = []
+            for path in self._stored_files():
+                try:
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+                except FileNotFoundError:
+                    pass
+            files.sort()
+            # Evict down to 90% so we don't rescan on every new image
+            target = self.max_bytes * 0.9
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            self._bytes = total
+
+
+def _is_svg(content: bytes) -> bool:
+    head = content[:1024].lstrip().lower()
+    return head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head)
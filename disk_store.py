@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskStore:
+    """Raw subject files on local disk, keyed by Drive file id.
+
+    Each entry is a single ``<file_id>.entry`` file: one line of JSON metadata
+    (Drive ``md5Checksum`` and ``modifiedTime`` at download time) followed by
+    the raw payload, replaced atomically on write. A read only succeeds when
+    the caller's metadata still matches, so the store survives restarts
+    without ever serving a file that changed on Drive.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.entry")
+
+    def _read(self, file_id: str) -> Optional[Tuple[Dict, bytes]]:
+        try:
+            with open(self._path(file_id), 'rb') as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading disk cache entry {file_id}: {str(e)}")
+            return None
+        return meta, content
+
+    def get(self, file_id: str, md5_checksum: Optional[str] = None, modified_time: Optional[str] = None) -> Optional[bytes]:
+        """Return stored bytes if they match the given Drive metadata, else None.
+
+        ``md5Checksum`` is authoritative when given; ``modifiedTime`` is only
+        compared when no checksum is available.
+        """
+        entry = self._read(file_id)
+        if entry is None:
+            return None
+        meta, content = entry
+        if md5_checksum is not None and meta.get('md5Checksum') != md5_checksum:
+            return None
+        if md5_checksum is None and modified_time is not None and meta.get('modifiedTime') != modified_time:
+            return None
+        if hashlib.md5(content).hexdigest() != meta.get('md5Checksum'):
+            logger.error(f"Disk cache entry {file_id} is corrupt, discarding")
+            self.delete(file_id)
+            return None
+        return content
+
+    def put(self, file_id: str, content: bytes, md5_checksum: Optional[str] = None, modified_time: Optional[str] = None):
+        meta = {
+            'md5Checksum': md5_checksum or hashlib.md5(content).hexdigest(),
+            'modifiedTime': modified_time,
+            'size': len(content),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(meta).encode('utf-8') + b'\n')
+                f.write(content)
+            os.replace(tmp_path, self._path(file_id))
+        except OSError as e:
+            logger.error(f"Error writing disk cache entry {file_id}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def delete(self, file_id: str):
+        try:
+            os.remove(self._path(file_id))
+        except FileNotFoundError:
+            pass
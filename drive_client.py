@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+import google_auth_httplib2
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Drive folder holding the departments; the app, compile_bundle.py and export_site.py all read it
+GOOGLE_DRIVE_FOLDER_ID = "15gnvPIxP4oqFghT1f-3lyciYApL7Qget"
+
+
+class DriveClientManager:
+    """Process-wide Drive v3 client with a pool of keep-alive connections.
+
+    The service object is built once from the discovery document bundled with
+    ``googleapiclient``. ``httplib2.Http`` is not thread-safe, so a request
+    checks an ``AuthorizedHttp`` out of the pool with ``connection()`` and
+    hands it back when done. Streamlit runs every rerun on a new thread, so
+    connections belong to the pool rather than to threads; it is LIFO so the
+    most recently used, still-open connections are reused first, and keeps
+    at most ``max_idle`` of them. All share one set of credentials, which a
+    daemon thread refreshes ``refresh_margin`` before they expire, so
+    requests never stop to refresh the token.
+    """
+
+    def __init__(self, credentials, refresh_margin: timedelta = timedelta(minutes=10), timeout: float = 60,
+                 max_idle: int = 16):
+        self.credentials = credentials
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.service = build('drive', 'v3', credentials=credentials, static_discovery=True)
+        self._idle: "queue.LifoQueue[google_auth_httplib2.AuthorizedHttp]" = queue.LifoQueue(maxsize=max_idle)
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def connection(self) -> Iterator[google_auth_httplib2.AuthorizedHttp]:
+        """Check out an authorized connection for one request or download, returning it afterwards"""
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+        try:
+            yield http
+        except HttpError:
+            # Drive answered, so the connection is still good
+            self._release(http)
+            raise
+        except BaseException:
+            # Possibly mid-response; don't hand it to anyone else
+            raise
+        else:
+            self._release(http)
+
+    def _release(self, http: google_auth_httplib2.AuthorizedHttp):
+        try:
+            self._idle.put_nowait(http)
+        except queue.Full:
+            pass
+
+    def start(self):
+        """Fetch a first token and keep it fresh from a daemon thread"""
+        self.refresh_token()
+        self._thread = threading.Thread(target=self._run, name='drive-token-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def refresh_token(self):
+        with self._refresh_lock:
+            self.credentials.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=self.timeout)))
+        logger.info(f"Drive token refreshed, expires {self.credentials.expiry}")
+
+    def _seconds_until_refresh(self) -> float:
+        expiry = self.credentials.expiry
+        if expiry is None:
+            return 0
+        # google-auth keeps expiry as a naive UTC datetime
+        return (expiry - self.refresh_margin - datetime.utcnow()).total_seconds()
+
+    def _run(self):
+        while not self._stop.wait(max(self._seconds_until_refresh(), 1)):
+            if self._seconds_until_refresh() > 0:
+                continue
+            try:
+                self.refresh_token()
+            except Exception as e:
+                logger.error(f"Error refreshing Drive token: {str(e)}")
+                # Retry shortly; the current token is still valid for most of the margin
+                self._stop.wait(30)
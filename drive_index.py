@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+def subject_version(subject_file: Dict) -> str:
+    """Identifies one version of a subject file, for cache and ETag keys"""
+    # Local mirrors have no md5Checksum; the id and modifiedTime identify a version just as well
+    return subject_file['md5Checksum'] or f"{subject_file['id']}@{subject_file['modifiedTime']}"
+
+
+class DriveIndex:
+    """In-process department → semester → subject tree of the Drive content folder.
+
+    The whole tree is rebuilt from a flat listing of every folder and file
+    (``list_all``), so a refresh costs a handful of paginated list calls rather
+    than one call per folder. Lookups are plain dictionary reads. Only the first
+    lookup waits for a listing; once the tree is older than ``ttl`` seconds a
+    lookup starts a rebuild on a background thread and is answered from the
+    current tree, as are all lookups until the rebuild is done.
+    """
+
+    def __init__(self, list_all: Callable[[], Iterable[Dict]], root_folder_id: str, ttl: float = 300):
+        self.list_all = list_all
+        self.root_folder_id = root_folder_id
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._nodes_lock = threading.Lock()
+        self._nodes: Dict[str, Dict] = {}
+        self._tree: Dict[str, Dict[str, Dict[str, Dict]]] = {}
+        self._built_at: Optional[float] = None
+
+    def refresh(self):
+        """Rebuild the tree from a fresh Drive listing"""
+        with telemetry.span('drive.index_refresh'):
+            nodes = {f['id']: f for f in self.list_all()}
+        with self._nodes_lock:
+            self._nodes = nodes
+            self._rebuild()
+        self._built_at = time.monotonic()
+        logger.info(f"Drive index rebuilt: {len(self._tree)} departments")
+
+    def apply_changes(self, changes: Iterable[Dict]) -> List[str]:
+        """Apply entries from the Drive changes feed and return the affected file ids.
+
+        Each change is a ``changes.list`` item: ``{'fileId', 'removed', 'file'}``.
+        Trashed or removed files are dropped; anything else is upserted, which
+        covers additions, renames, moves and content edits.
+        """
+        changed = []
+        with self._nodes_lock:
+            for change in changes:
+                file_id = change['fileId']
+                f = change.get('file')
+                if change.get('removed') or f is None or f.get('trashed'):
+                    if self._nodes.pop(file_id, None) is not None:
+                        changed.append(file_id)
+                else:
+                    self._nodes[file_id] = f
+                    changed.append(file_id)
+            if changed:
+                self._rebuild()
+        return list(dict.fromkeys(changed))
+
+    def _rebuild(self):
+        children: Dict[str, List[Dict]] = {}
+        for f in self._nodes.values():
+            for parent in f.get('parents', []):
+                children.setdefault(parent, []).append(f)
+
+        tree = {}
+        for dept in children.get(self.root_folder_id, []):
+            if dept['mimeType'] != FOLDER_MIME_TYPE:
+                continue
+            semesters = tree.setdefault(dept['name'], {})
+            for sem in children.get(dept['id'], []):
+                if sem['mimeType'] != FOLDER_MIME_TYPE:
+                    continue
+                subjects = semesters.setdefault(sem['name'], {})
+                for f in children.get(sem['id'], []):
+                    if f['name'].endswith('.json'):
+                        subjects[f['name'][:-len('.json')]] = {
+                            'id': f['id'],
+                            'modifiedTime': f.get('modifiedTime'),
+                            'md5Checksum': f.get('md5Checksum'),
+                        }
+        self._tree = tree
+
+    def _current(self) -> Dict[str, Dict[str, Dict[str, Dict]]]:
+        if self._built_at is None:
+            with self._lock:
+                # Another thread may have built it while we waited for the lock
+                if self._built_at is None:
+                    self.refresh()
+        elif self._expired() and self._lock.acquire(blocking=False):
+            if self._expired():
+                # Readers keep the current tree while one thread rebuilds it
+                threading.Thread(target=self._refresh_in_background, name='drive-index-refresh', daemon=True).start()
+            else:
+                # Rebuilt between our check and taking the lock
+                self._lock.release()
+        return self._tree
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._built_at > self.ttl
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing Drive index, serving stale tree: {str(e)}")
+            self._built_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def departments(self) -> List[str]:
+        return sorted(self._current())
+
+    def semesters(self, department: str) -> List[str]:
+        return sorted(self._current().get(department, {}))
+
+    def subjects(self, department: str, semester: str) -> List[str]:
+        return sorted(self._current().get(department, {}).get(semester, {}))
+
+    def subject_file(self, department: str, semester: str, subject: str) -> Optional[Dict]:
+        """Return ``{'id', 'modifiedTime', 'md5Checksum'}`` for a subject JSON file, or None"""
+        return self._current().get(department, {}).get(semester, {}).get(subject)
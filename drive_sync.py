@@ -0,0 +1,84 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from drive_index import DriveIndex
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FIELDS = (
+    "nextPageToken, newStartPageToken, "
+    "changes(fileId, removed, file(id, name, mimeType, parents, modifiedTime, md5Checksum, trashed))"
+)
+
+
+class DriveChangesSyncer:
+    """Background poller of the Drive changes feed.
+
+    Records a ``startPageToken`` on start, then every ``interval`` seconds pulls
+    only what changed since and applies it to the index. ``on_change`` is called
+    with the list of affected file ids so caches can drop stale entries.
+    ``execute`` runs each request, e.g. ``DriveBackend.execute`` so the poller
+    thread gets its own HTTP connection.
+    """
+
+    def __init__(self, service, index: DriveIndex, interval: float = 30,
+                 on_change: Optional[Callable[[List[str]], None]] = None,
+                 execute: Optional[Callable] = None):
+        self.service = service
+        self.execute = execute or (lambda request: request.execute())
+        self.index = index
+        self.interval = interval
+        self.on_change = on_change
+        self.page_token: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Record the current start token and begin polling in a daemon thread"""
+        if self.page_token is None:
+            self.page_token = self.execute(self.service.changes().getStartPageToken())['startPageToken']
+        self._thread = threading.Thread(target=self._run, name='drive-changes-syncer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling Drive changes: {str(e)}")
+
+    def poll(self) -> List[str]:
+        """Fetch and apply every change page since the recorded token"""
+        if self.page_token is None:
+            self.page_token = self.execute(self.service.changes().getStartPageToken())['startPageToken']
+            return []
+
+        changes: List[Dict] = []
+        page_token = self.page_token
+        new_start_token = self.page_token
+        while page_token is not None:
+            results = self.execute(self.service.changes().list(
+                pageToken=page_token,
+                fields=CHANGE_FIELDS,
+                includeRemoved=True,
+                pageSize=1000
+            ))
+            changes.extend(results.get('changes', []))
+            page_token = results.get('nextPageToken')
+            if 'newStartPageToken' in results:
+                new_start_token = results['newStartPageToken']
+
+        changed = self.index.apply_changes(changes)
+        # Only advance once the whole batch has been applied
+        self.page_token = new_start_token
+        if changed:
+            logger.info(f"Applied {len(changed)} Drive changes")
+            if self.on_change is not None:
+                self.on_change(changed)
+        return changed
@@ -0,0 +1,350 @@
+"""Export every department, semester and subject as static, precompressed HTML pages.
+
+    python export_site.py --output site
+    python export_site.py --local content --output site
+    python export_site.py --output site --watch 300   # re-export whenever Drive changes
+
+Subject pages use the app's card styling (``styles.CUSTOM_CSS``) and module,
+topic and subtopic markup (``subject_html``); modules are collapsible and
+show every topic. Each page gets a ``.html.gz`` copy beside it for servers
+that send precompressed files (nginx ``gzip_static on``, Caddy
+``file_server { precompressed gzip }``), so any static file server can
+take read-only traffic while Streamlit handles interactive use.
+
+Exports are incremental. ``manifest.json`` in the output records the Drive
+version each subject page was rendered from; only new or changed subjects
+are downloaded and rendered again, pages of removed subjects are deleted,
+and listing pages are only rewritten when their content changes.
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from compile_bundle import DEFAULT_SECRETS, drive_backend, subject_files
+from drive_client import GOOGLE_DRIVE_FOLDER_ID
+from drive_index import DriveIndex, subject_version
+from storage import ContentBackend, LocalBackend
+from styles import CUSTOM_CSS
+from subject_decoder import decode_subject
+from subject_html import CompiledModule, CompiledSubject
+from subject_model import Subject
+
+logger = logging.getLogger('export_site')
+
+MANIFEST = 'manifest.json'
+
+# What the app gets from Streamlit's layout: a centred column, and modules that open and close
+STATIC_CSS = """
+<style>
+body { margin: 0; background: #f7fafc; font-family: 'Inter', sans-serif; color: #2d3748; }
+.main .block-container { margin: 0 auto; padding-left: 1rem; padding-right: 1rem; }
+.breadcrumbs { margin-bottom: 1.5rem; color: #718096; }
+.breadcrumbs a, a.listing-link { color: inherit; text-decoration: none; }
+details.module > summary { list-style: none; cursor: pointer; }
+details.module > summary::-webkit-details-marker { display: none; }
+.image-gallery img { width: 100%; height: auto; border-radius: 6px; }
+.stat-card { flex: 1; }
+</style>
+"""
+
+# Open the module named in the URL fragment, e.g. subject.html#module_3
+OPEN_LINKED_MODULE_JS = """
+<script>
+function openLinkedModule() {
+    var module = location.hash && document.getElementById(location.hash.slice(1));
+    if (module && module.tagName === 'DETAILS') { module.open = true; module.scrollIntoView(); }
+}
+window.addEventListener('hashchange', openLinkedModule);
+openLinkedModule();
+</script>
+"""
+
+
+def slug(name: str) -> str:
+    return re.sub(r'[^\w.-]+', '-', name).strip('-.') or 'untitled'
+
+
+def render_version() -> str:
+    """Changes whenever the page markup or styling could have, so every page is re-rendered"""
+    digest = hashlib.md5(CUSTOM_CSS.encode('utf-8'))
+    for source in (__file__, inspect.getsourcefile(CompiledSubject)):
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def page(title: str, crumbs: List[Tuple[str, Optional[str]]], body: str) -> str:
+    """A complete page; ``crumbs`` are (label, href or None for the current page)"""
+    breadcrumbs = ' › '.join(
+        f'<a href="{html.escape(href)}">{html.escape(label)}</a>' if href else html.escape(label)
+        for label, href in crumbs
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)} · Modern Learning Hub</title>
+{CUSTOM_CSS}{STATIC_CSS}</head>
+<body>
+<div class="main"><div class="block-container">
+<div class="custom-header">
+    <h1>🎓 Modern Learning Hub</h1>
+</div>
+<div class="breadcrumbs">{breadcrumbs}</div>
+{body}
+</div></div>
+{OPEN_LINKED_MODULE_JS}</body>
+</html>
+"""
+
+
+def render_blocks(blocks) -> str:
+    parts = []
+    for kind, block in blocks:
+        if kind == 'html':
+            parts.append(block)
+            continue
+        # A row of up to 3 diagrams, each its title card over the image, as the app's columns
+        parts.append('<div class="image-gallery">')
+        for title_html, url in block:
+            url = html.escape(url)
+            parts.append(f'<div>{title_html}<a href="{url}"><img src="{url}" loading="lazy" alt=""></a></div>')
+        parts.append('</div>')
+    return '\n'.join(parts)
+
+
+def render_module(module: CompiledModule) -> str:
+    topics = '\n'.join(render_blocks(blocks) for blocks in module.topics)
+    return f"""<details class="module" id="{module.module_id}">
+<summary>{module.header_html}</summary>
+<div class="module-content">{topics}</div>
+</details>"""
+
+
+def render_subject(department: str, semester: str, subject: str, compiled: CompiledSubject) -> str:
+    body = f"""
+    <div class="subject-info-card">
+        <h2>📖 {html.escape(subject)}</h2>
+        <div class="subject-path">{html.escape(department)} • {html.escape(semester)}</div>
+    </div>
+    <div class="stats-container">{''.join(compiled.stat_cards)}</div>
+    {''.join(render_module(module) for module in compiled.modules)}
+    """
+    crumbs = [('Home', '../../index.html'), (department, '../index.html'), (semester, 'index.html'), (subject, None)]
+    return page(subject, crumbs, body)
+
+
+def render_listing(title: str, crumbs: List[Tuple[str, Optional[str]]], items: List[Tuple[str, str, str]]) -> str:
+    """A page of cards linking to (label, href, summary) items"""
+    cards = ''.join(f"""
+    <a class="listing-link" href="{html.escape(href)}">
+        <div class="content-card module-card">
+            <div class="module-title">{html.escape(label)}</div>
+            <div class="module-summary">{html.escape(summary)}</div>
+        </div>
+    </a>"""
+                    for label, href, summary in items)
+    return page(title, crumbs, cards)
+
+
+def _plural(count: int, word: str) -> str:
+    return f"{count} {word}{'s' if count != 1 else ''}"
+
+
+def write_page(path: str, markup: str) -> bool:
+    """Write ``path`` and ``path.gz`` atomically unless unchanged; returns whether written"""
+    data = markup.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data and os.path.exists(path + '.gz'):
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 keeps the .gz byte-identical across exports of the same page
+    for target, content in ((path + '.gz', gzip.compress(data, 9, mtime=0)), (path, data)):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return True
+
+
+def remove_page(path: str):
+    for target in (path, path + '.gz'):
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
+
+
+def load_manifest(output: str) -> Dict:
+    try:
+        with open(os.path.join(output, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(output: str, manifest: Dict):
+    fd, tmp_path = tempfile.mkstemp(dir=output, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, os.path.join(output, MANIFEST))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def page_paths(files: List[Tuple[str, str, str, Dict]]) -> Dict[Tuple[str, str, str], str]:
+    """Relative page path per subject; names that slug alike get the file id appended"""
+    paths, taken = {}, set()
+    for department, semester, subject, subject_file in files:
+        path = f"{slug(department)}/{slug(semester)}/{slug(subject)}.html"
+        if path in taken:
+            path = f"{path[:-len('.html')]}-{subject_file['id']}.html"
+        taken.add(path)
+        paths[(department, semester, subject)] = path
+    return paths
+
+
+def export(backend: ContentBackend, output: str, workers: int = 8, max_bytes: Optional[int] = None,
+           force: bool = False) -> Dict[str, int]:
+    """Bring the site in ``output`` up to date with ``backend``; returns counts of what was done"""
+    os.makedirs(output, exist_ok=True)
+    index = DriveIndex(backend.list_tree, backend.root_id)
+    index.refresh()
+    files = subject_files(index)
+    paths = page_paths(files)
+
+    manifest = load_manifest(output)
+    version = render_version()
+    exported: Dict[str, Dict] = manifest.get('subjects', {})
+    current = manifest.get('render_version') == version and not force
+    subjects: Dict[str, Dict] = {}
+    stale = []
+    for department, semester, subject, subject_file in files:
+        path = paths[(department, semester, subject)]
+        entry = exported.get(path) if current else None
+        if entry is not None and entry['version'] == subject_version(subject_file) \
+                and os.path.exists(os.path.join(output, path)):
+            subjects[path] = entry
+        else:
+            stale.append((department, semester, subject, subject_file))
+
+    def render(item) -> Tuple[str, Optional[Dict]]:
+        department, semester, subject, subject_file = item
+        path = paths[(department, semester, subject)]
+        try:
+            raw = backend.get_file_content(subject_file['id'], max_bytes)
+            compiled = CompiledSubject(Subject.from_dict(decode_subject(raw)))
+            write_page(os.path.join(output, path), render_subject(department, semester, subject, compiled))
+        except Exception as e:
+            logger.error(f"Error exporting {department}/{semester}/{subject}: {str(e)}")
+            return path, None
+        return path, {'path': [department, semester, subject], 'version': subject_version(subject_file)}
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, entry in pool.map(render, stale):
+            if entry is None:
+                # Keep serving the last good page, even one in an older layout; no version,
+                # so the next export tries again
+                failed += 1
+                if path in exported and os.path.exists(os.path.join(output, path)):
+                    subjects[path] = {'path': exported[path]['path'], 'version': None}
+                continue
+            subjects[path] = entry
+
+    listings = write_listings(output, index, paths, subjects)
+    removed = 0
+    for path in set(exported) - set(subjects):
+        remove_page(os.path.join(output, path))
+        removed += 1
+    for path in set(manifest.get('listings', [])) - set(listings):
+        remove_page(os.path.join(output, path))
+    _remove_empty_dirs(output)
+
+    save_manifest(output, {'render_version': version, 'subjects': subjects, 'listings': sorted(listings)})
+    return {'rendered': len(stale) - failed, 'unchanged': len(files) - len(stale), 'removed': removed,
+            'failed': failed}
+
+
+def write_listings(output: str, index: DriveIndex, paths: Dict[Tuple[str, str, str], str],
+                   exported: Dict[str, Dict]) -> List[str]:
+    """Write the index, department and semester pages, linking only subjects with a page; returns their paths"""
+    listings = ['index.html']
+    departments = []
+    for department in index.departments():
+        semesters = []
+        for semester in index.semesters(department):
+            subjects = [(subject, os.path.basename(paths[(department, semester, subject)]), '')
+                        for subject in index.subjects(department, semester)
+                        if paths[(department, semester, subject)] in exported]
+            semester_page = f"{slug(department)}/{slug(semester)}/index.html"
+            write_page(os.path.join(output, semester_page), render_listing(
+                semester, [('Home', '../../index.html'), (department, '../index.html'), (semester, None)], subjects))
+            listings.append(semester_page)
+            semesters.append((semester, f"{slug(semester)}/index.html", _plural(len(subjects), 'subject')))
+        department_page = f"{slug(department)}/index.html"
+        write_page(os.path.join(output, department_page), render_listing(
+            department, [('Home', '../index.html'), (department, None)], semesters))
+        listings.append(department_page)
+        departments.append((department, department_page, _plural(len(semesters), 'semester')))
+    write_page(os.path.join(output, 'index.html'), render_listing('Departments', [('Home', None)], departments))
+    return listings
+
+
+def _remove_empty_dirs(output: str):
+    for directory, _, _ in sorted(os.walk(output), key=lambda walked: len(walked[0]), reverse=True):
+        if directory != output and not os.listdir(directory):
+            os.rmdir(directory)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='site', help="directory to write the site into")
+    parser.add_argument('--folder-id', default=GOOGLE_DRIVE_FOLDER_ID, help="Drive folder holding the departments")
+    parser.add_argument('--secrets', default=DEFAULT_SECRETS, help="secrets.toml with [gcp_service_account]")
+    parser.add_argument('--local', metavar='DIR', help="export a local mirror instead of Drive")
+    parser.add_argument('--workers', type=int, default=8, help="parallel downloads")
+    parser.add_argument('--max-file-mb', type=int, default=64, help="skip subject files larger than this")
+    parser.add_argument('--force', action='store_true', help="re-render every page")
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help="keep exporting, this often")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    backend = LocalBackend(args.local) if args.local else drive_backend(args.folder_id, args.secrets)
+    force = args.force
+    while True:
+        started = time.monotonic()
+        result = export(backend, args.output, args.workers, args.max_file_mb * 1024 * 1024, force)
+        logger.info(f"Exported {args.output}: {result['rendered']} rendered, {result['unchanged']} unchanged, "
+                    f"{result['removed']} removed, {result['failed']} failed in {time.monotonic() - started:.1f}s")
+        if not args.watch:
+            return 1 if result['failed'] else 0
+        force = False
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
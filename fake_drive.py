@@ -0,0 +1,168 @@
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class _Request:
+    def __init__(self, drive: 'FakeDriveService', fn):
+        self._drive = drive
+        self._fn = fn
+
+    def execute(self, **kwargs):
+        if self._drive.latency:
+            time.sleep(self._drive.latency)
+        return self._fn()
+
+
+class FakeDriveService:
+    """In-process stand-in for the subset of the Drive v3 client the app uses.
+
+    Mirrors ``files().list/get_media`` and ``changes().getStartPageToken/list``
+    closely enough to drive the index, caches and syncer without credentials.
+    Every mutation (``add_folder``, ``add_file``, ``update_file``, ``rename``,
+    ``trash``) is appended to a change log, so a scenario can script exactly
+    which change pages the syncer will see; ``page_size`` splits them across
+    pages. ``latency`` seconds are slept on every ``execute()``.
+    """
+
+    def __init__(self, page_size: int = 100, latency: float = 0):
+        self.page_size = page_size
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._files: Dict[str, Dict] = {}
+        self._content: Dict[str, bytes] = {}
+        self._changes: List[Dict] = []
+        self.calls: Dict[str, int] = {}
+
+    # Mutations
+
+    def add_folder(self, name: str, parent: Optional[str] = None, file_id: Optional[str] = None) -> str:
+        return self._upsert(file_id or f"folder{next(self._ids)}", name, FOLDER_MIME_TYPE, parent)
+
+    def add_file(self, name: str, content: bytes, parent: str, file_id: Optional[str] = None,
+                 mime_type: str = 'application/json') -> str:
+        file_id = self._upsert(file_id or f"file{next(self._ids)}", name, mime_type, parent)
+        self.update_file(file_id, content)
+        return file_id
+
+    def load_directory(self, path: str, parent: str):
+        """Mirror a local directory tree under ``parent``, folders and ``.json`` files only"""
+        for entry in sorted(os.scandir(path), key=lambda e: e.name):
+            if entry.is_dir():
+                self.load_directory(entry.path, self.add_folder(entry.name, parent))
+            elif entry.name.endswith('.json'):
+                with open(entry.path, 'rb') as f:
+                    self.add_file(entry.name, f.read(), parent)
+
+    def update_file(self, file_id: str, content: bytes):
+        with self._lock:
+            f = dict(self._files[file_id], modifiedTime=self._now(), md5Checksum=hashlib.md5(content).hexdigest())
+            self._files[file_id] = f
+            self._content[file_id] = content
+            self._log_change(file_id)
+
+    def rename(self, file_id: str, name: str):
+        with self._lock:
+            self._files[file_id] = dict(self._files[file_id], name=name, modifiedTime=self._now())
+            self._log_change(file_id)
+
+    def trash(self, file_id: str):
+        with self._lock:
+            self._files[file_id] = dict(self._files[file_id], trashed=True)
+            self._log_change(file_id)
+
+    def _upsert(self, file_id: str, name: str, mime_type: str, parent: Optional[str]) -> str:
+        with self._lock:
+            self._files[file_id] = {
+                'id': file_id,
+                'name': name,
+                'mimeType': mime_type,
+                'parents': [parent] if parent else [],
+                'modifiedTime': self._now(),
+                'trashed': False,
+            }
+            self._log_change(file_id)
+        return file_id
+
+    def _log_change(self, file_id: str):
+        self._changes.append({'fileId': file_id, 'removed': False, 'file': dict(self._files[file_id])})
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    def _count(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    # Drive v3 surface
+
+    def files(self):
+        return _Files(self)
+
+    def changes(self):
+        return _Changes(self)
+
+
+class _Files:
+    def __init__(self, drive: FakeDriveService):
+        self.drive = drive
+
+    def list(self, q: str = '', fields: str = '', pageSize: int = 100, pageToken: Optional[str] = None, **kwargs):
+        def run():
+            self.drive._count('files.list')
+            parent = re.search(r"'([^']+)' in parents", q)
+            with self.drive._lock:
+                files = [f for f in self.drive._files.values()
+                         if (parent is None or parent.group(1) in f['parents'])
+                         and not ('trashed = false' in q and f['trashed'])]
+            start = int(pageToken or 0)
+            page = files[start:start + pageSize]
+            results = {'files': [dict(f) for f in page]}
+            if start + pageSize < len(files):
+                results['nextPageToken'] = str(start + pageSize)
+            return results
+        return _Request(self.drive, run)
+
+    def get_media(self, fileId: str, **kwargs):
+        def run():
+            self.drive._count('files.get_media')
+            with self.drive._lock:
+                return self.drive._content[fileId]
+        return _Request(self.drive, run)
+
+
+class _Changes:
+    def __init__(self, drive: FakeDriveService):
+        self.drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        def run():
+            self.drive._count('changes.getStartPageToken')
+            with self.drive._lock:
+                return {'startPageToken': str(len(self.drive._changes))}
+        return _Request(self.drive, run)
+
+    def list(self, pageToken: str, pageSize: Optional[int] = None, **kwargs):
+        def run():
+            self.drive._count('changes.list')
+            size = min(pageSize or self.drive.page_size, self.drive.page_size)
+            start = int(pageToken)
+            with self.drive._lock:
+                page = self.drive._changes[start:start + size]
+                end = start + len(page)
+                results = {'changes': [dict(c) for c in page]}
+                if end < len(self.drive._changes):
+                    results['nextPageToken'] = str(end)
+                else:
+                    results['newStartPageToken'] = str(end)
+            return results
+        return _Request(self.drive, run)
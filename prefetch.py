@@ -0,0 +1,105 @@
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from subject_loader import SubjectLoader
+
+logger = logging.getLogger(__name__)
+
+
+class NavigationStats:
+    """Process-wide subject view counts used to guess the next selection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views: Counter = Counter()
+
+    def record(self, department: str, semester: str, subject: str):
+        with self._lock:
+            self._views[(department, semester, subject)] += 1
+
+    def views(self, department: str, semester: str, subject: str) -> int:
+        with self._lock:
+            return self._views[(department, semester, subject)]
+
+    def most_viewed(self, department: str, n: int) -> List[Tuple[str, str]]:
+        """Top ``n`` (semester, subject) pairs of a department by view count"""
+        with self._lock:
+            ranked = [(count, key) for key, count in self._views.items() if key[0] == department]
+        ranked.sort(key=lambda item: -item[0])
+        return [(semester, subject) for _, (_, semester, subject) in ranked[:n]]
+
+
+class SpeculativePrefetcher:
+    """Warms the subject cache with the likely next selections of each session.
+
+    On every selection the session's still-queued prefetches are cancelled and
+    replaced by fresh candidates: siblings in the same semester (most viewed
+    first), then the department's most viewed subjects. Picking a semester
+    queues every subject in it, since readers usually open several; those
+    are only cancelled when the session picks another semester. Work runs on
+    a pool of ``max_workers`` threads so it never competes with the rerun in
+    progress for more than that many Drive connections.
+    """
+
+    def __init__(self, loader: SubjectLoader, stats: NavigationStats,
+                 max_workers: int = 2, max_candidates: int = 6):
+        self.loader = loader
+        self.stats = stats
+        self.max_candidates = max_candidates
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculative-prefetch')
+        self._lock = threading.Lock()
+        self._queued: Dict[str, List[Future]] = {}
+        self._semester_queued: Dict[str, List[Future]] = {}
+
+    def on_select(self, session_id: str, department: str, semester: str, subject: str):
+        """Record a view and reschedule this session's speculative prefetches"""
+        self.stats.record(department, semester, subject)
+        candidates = self.candidates(department, semester, subject)
+
+        with self._lock:
+            self._queued = self._replace(self._queued, session_id, candidates)
+
+    def on_semester(self, session_id: str, department: str, semester: str):
+        """Queue every subject of a newly picked semester that isn't in memory yet"""
+        index = self.loader.index
+        subject_files = [index.subject_file(department, semester, s) for s in index.subjects(department, semester)]
+        subject_files = [f for f in subject_files if f is not None and not self.loader.contains(f)]
+        with self._lock:
+            self._semester_queued = self._replace(self._semester_queued, session_id, subject_files)
+
+    def _replace(self, queued: Dict[str, List[Future]], session_id: str,
+                 subject_files: List[Dict]) -> Dict[str, List[Future]]:
+        for future in queued.pop(session_id, []):
+            future.cancel()
+        # Forget sessions whose work has all finished so departed sessions don't accumulate
+        queued = {sid: fs for sid, fs in queued.items() if not all(f.done() for f in fs)}
+        queued[session_id] = [self._pool.submit(self._prefetch, f) for f in subject_files]
+        return queued
+
+    def candidates(self, department: str, semester: str, subject: str) -> List[Dict]:
+        index = self.loader.index
+        siblings = [s for s in index.subjects(department, semester) if s != subject]
+        siblings.sort(key=lambda s: -self.stats.views(department, semester, s))
+        paths = [(semester, s) for s in siblings]
+        paths += [p for p in self.stats.most_viewed(department, self.max_candidates)
+                  if p != (semester, subject) and p not in paths]
+
+        candidates = []
+        for sem, subj in paths:
+            subject_file = index.subject_file(department, sem, subj)
+            if subject_file is not None and not self.loader.contains(subject_file):
+                candidates.append(subject_file)
+            if len(candidates) >= self.max_candidates:
+                break
+        return candidates
+
+    def _prefetch(self, subject_file: Dict):
+        if self.loader.contains(subject_file):
+            return
+        try:
+            self.loader.load_file(subject_file, record=False)
+        except Exception as e:
+            logger.error(f"Error prefetching {subject_file['id']}: {str(e)}")
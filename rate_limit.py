@@ -0,0 +1,165 @@
+import logging
+import random
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Drive answers quota exhaustion with 429 or with 403 and one of these reasons
+_RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+_RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Process-wide limit of ``rate`` calls per second with bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """Take one token if available and return 0, else return the seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+def is_retryable(e: Exception) -> bool:
+    """Rate limiting, a server-side failure or a dropped connection"""
+    if isinstance(e, HttpError):
+        status = e.resp.status
+        if status == 403:
+            return any(reason in (e.content or b'') for reason in _RATE_LIMIT_REASONS)
+        return status in _RETRYABLE_STATUSES
+    return isinstance(e, (ConnectionError, socket.timeout, httplib2.HttpLib2Error))
+
+
+class Backoff:
+    """Retries a call with full-jitter exponential backoff, taking a limiter token per attempt.
+
+    Attempt ``n`` (from 0) that fails with a retryable error sleeps a random
+    time between 0 and ``min(cap, base * 2 ** n)`` before the next one, so
+    sessions that were rate limited together do not retry in lockstep.
+    """
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, max_retries: int = 5,
+                 base: float = 0.5, cap: float = 32):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+
+    def call(self, fn: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                telemetry.count('drive.errors')
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                telemetry.count('drive.retries')
+                delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+                logger.warning(f"Drive call failed ({str(e)}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+
+class _Abandoned(Exception):
+    """The call's own thread was interrupted (e.g. a Streamlit rerun), so its result never came"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it runs
+    wait for and share its result or exception. Nothing is kept once the call
+    finishes, so this deduplicates work in flight rather than caching it.
+
+    An exception that is not an ``Exception`` (such as Streamlit's rerun and
+    stop signals) belongs to the leader's thread, not to the call, so it is
+    raised there only and the waiting callers try again. With ``tick`` the
+    call runs on a background thread instead, and every caller, including
+    the one that started it, calls ``tick()`` in its own thread every
+    ``interval`` seconds while it waits, e.g. to show progress.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T], tick: Optional[Callable[[], None]] = None,
+           interval: float = 0.1) -> T:
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+            if leader and tick is None:
+                return self._run(key, fn, future)
+            if leader:
+                threading.Thread(target=self._run_quietly, args=(key, fn, future), daemon=True).start()
+            try:
+                return self._wait(future, tick, interval)
+            except _Abandoned:
+                continue
+
+    @staticmethod
+    def _wait(future: Future, tick: Optional[Callable[[], None]], interval: float):
+        while True:
+            try:
+                return future.result(timeout=interval if tick is not None else None)
+            except FutureTimeout:
+                tick()
+
+    def _run(self, key: Hashable, fn: Callable[[], T], future: Future) -> T:
+        try:
+            result = fn()
+        except BaseException as e:
+            # Forget the call first, so callers that retry start a new one
+            self._forget(key)
+            future.set_exception(e if isinstance(e, Exception) else _Abandoned())
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _run_quietly(self, key: Hashable, fn: Callable[[], T], future: Future):
+        try:
+            self._run(key, fn, future)
+        except BaseException:
+            # The callers waiting on the future get the exception
+            pass
+
+    def _forget(self, key: Hashable):
+        with self._lock:
+            del self._calls[key]
@@ -0,0 +1,319 @@
+import html
+import logging
+import heapq
+import math
+import queue
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from drive_index import DriveIndex, subject_version
+from rate_limit import TokenBucket
+from subject_model import Subject
+
+logger = logging.getLogger(__name__)
+
+_TAG = re.compile(r'<[^>]*>')
+_WORD = re.compile(r'\w+')
+_STOP_WORDS = frozenset(
+    'a an and are as at be by for from in is it of on or that the this to with'.split()
+)
+
+# Per-field weight of a term occurrence; titles say more about a topic than its body text
+MODULE_TITLE_WEIGHT = 3.0
+TOPIC_TITLE_WEIGHT = 3.0
+SUBTOPIC_TITLE_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+# How many index terms a trailing partial word may expand to
+MAX_PREFIX_TERMS = 50
+
+SubjectPath = Tuple[str, str, str]
+
+
+class SearchHit(NamedTuple):
+    department: str
+    semester: str
+    subject: str
+    module_number: object
+    module_title: str
+    topic_number: Optional[int]
+    topic_title: Optional[str]
+    score: float
+
+
+def normalize(text: str) -> List[str]:
+    """Terms of a text: tags stripped, entities decoded, accents folded, lower-cased"""
+    text = html.unescape(_TAG.sub(' ', text))
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.lower()
+    return [t for t in _WORD.findall(text) if len(t) > 1 and t not in _STOP_WORDS]
+
+
+class SearchIndex:
+    """Inverted index over module, topic and subtopic titles and text of every subject.
+
+    A document is a module (its title) or a topic (its title, text, subtopic
+    titles and subtopic text). Subjects are indexed one at a time and replaced
+    whole when their file changes, so the index is built incrementally while
+    queries keep being served from the previous version. ``search`` ANDs the
+    query terms, treats the last one as a prefix for search-as-you-type, and
+    ranks by field-weighted term frequency times IDF.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._docs: Dict[int, Tuple] = {}
+        self._subjects: Dict[SubjectPath, Tuple[str, List[int], Set[str]]] = {}
+        self._next_doc = 0
+        self._sorted_terms: Optional[List[str]] = None
+
+    def indexed_version(self, path: SubjectPath) -> Optional[str]:
+        entry = self._subjects.get(path)
+        return entry[0] if entry is not None else None
+
+    def subjects(self) -> List[SubjectPath]:
+        with self._lock:
+            return list(self._subjects)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'subjects': len(self._subjects), 'documents': len(self._docs), 'terms': len(self._postings)}
+
+    def add_subject(self, path: SubjectPath, version: str, subject: Subject):
+        """Index (or re-index) one subject; ``version`` identifies the file contents"""
+        docs = []
+        for module in subject.modules:
+            terms = Counter()
+            self._count(terms, module.title, MODULE_TITLE_WEIGHT)
+            docs.append(((module.number, module.title, None, None), terms))
+
+            for topic_idx, topic in enumerate(module.read_topics(), 1):
+                terms = Counter()
+                self._count(terms, topic.title, TOPIC_TITLE_WEIGHT)
+                self._count(terms, topic.text, TEXT_WEIGHT)
+                for subtopic in topic.subtopics:
+                    self._count(terms, subtopic.title, SUBTOPIC_TITLE_WEIGHT)
+                    self._count(terms, subtopic.text, TEXT_WEIGHT)
+                docs.append(((module.number, module.title, topic_idx, topic.title), terms))
+
+        with self._lock:
+            self._remove(path)
+            doc_ids = []
+            subject_terms = set()
+            for doc, terms in docs:
+                doc_id = self._next_doc
+                self._next_doc += 1
+                self._docs[doc_id] = path + doc
+                doc_ids.append(doc_id)
+                for term, weight in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = weight
+                subject_terms.update(terms)
+            self._subjects[path] = (version, doc_ids, subject_terms)
+            self._sorted_terms = None
+
+    def remove_subject(self, path: SubjectPath):
+        with self._lock:
+            self._remove(path)
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        terms = normalize(query)
+        if not terms:
+            return []
+        partial = not query[-1:].isspace()
+
+        with self._lock:
+            n_docs = len(self._docs) or 1
+            scores: Optional[Dict[int, float]] = None
+            for i, term in enumerate(terms):
+                if partial and i == len(terms) - 1:
+                    matches = self._prefix_postings(term)
+                else:
+                    matches = [self._postings.get(term, {})]
+
+                term_scores: Dict[int, float] = {}
+                for postings in matches:
+                    idf = math.log(1 + n_docs / len(postings)) if postings else 0
+                    for doc_id, weight in postings.items():
+                        if scores is None or doc_id in scores:
+                            term_scores[doc_id] = term_scores.get(doc_id, 0) + weight * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items()}
+                if not scores:
+                    return []
+
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [SearchHit(*self._docs[doc_id], score) for doc_id, score in ranked]
+
+    def _prefix_postings(self, prefix: str) -> List[Dict[int, float]]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        matches = []
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix) or len(matches) >= MAX_PREFIX_TERMS:
+                break
+            matches.append(self._postings[terms[i]])
+        return matches
+
+    def _remove(self, path: SubjectPath):
+        entry = self._subjects.pop(path, None)
+        if entry is None:
+            return
+        _, doc_ids, terms = entry
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            for doc_id in doc_ids:
+                postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        for doc_id in doc_ids:
+            del self._docs[doc_id]
+        self._sorted_terms = None
+
+    @staticmethod
+    def _count(terms: Counter, text: str, weight: float):
+        for term in normalize(text):
+            terms[term] += weight
+
+
+class SearchIndexer:
+    """Keeps a ``SearchIndex`` in step with the Drive index from a daemon thread.
+
+    Subjects are indexed as readers load them: pass ``on_load`` to the
+    loader as its fill hook. Every ``interval`` seconds, or as soon as
+    ``request_sync`` is called (e.g. after the Drive changes feed reported
+    edits), subjects that disappeared are dropped, new or changed ones already
+    in memory (``cached``) are indexed from there, and the rest are backfilled
+    through ``load``, one per token of the ``backfill`` limiter, so indexing
+    takes only a trickle of the Drive quota readers share. Without a limiter
+    they are all loaded during the sync.
+    """
+
+    def __init__(self, search_index: SearchIndex, index: DriveIndex,
+                 load: Callable[[Dict], Subject], interval: float = 300,
+                 cached: Optional[Callable[[Dict], bool]] = None, backfill: Optional[TokenBucket] = None):
+        self.search_index = search_index
+        self.index = index
+        self.load = load
+        self.interval = interval
+        self.cached = cached
+        self.backfill = backfill
+        # Subjects loaded by readers, or None to wake the thread
+        self._loaded: "queue.Queue[Optional[Tuple[Dict, Subject]]]" = queue.Queue()
+        self._paths: Dict[str, SubjectPath] = {}
+        self._pending: List[SubjectPath] = []
+        self._sync_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._loaded.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+    def request_sync(self, *_):
+        self._sync_requested.set()
+        self._loaded.put(None)
+
+    def on_load(self, subject_file: Dict, subject: Subject):
+        """Loader fill hook; the subject is indexed from the indexer's thread"""
+        self._loaded.put((subject_file, subject))
+
+    def _run(self):
+        next_sync = 0.0
+        while not self._stop.is_set():
+            if self._sync_requested.is_set() or time.monotonic() >= next_sync:
+                self._sync_requested.clear()
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Error syncing search index: {str(e)}")
+                next_sync = time.monotonic() + self.interval
+
+            timeout = max(0.0, next_sync - time.monotonic())
+            if self._pending:
+                wait = self.backfill.try_acquire()
+                if not wait:
+                    self._backfill_next()
+                    continue
+                timeout = min(timeout, wait)
+            try:
+                loaded = self._loaded.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if loaded is not None:
+                self._add(*loaded)
+
+    def sync(self) -> int:
+        """Index every new or changed subject held in memory and queue the rest; returns how many were indexed"""
+        paths = {}
+        stale = []
+        for department in self.index.departments():
+            for semester in self.index.semesters(department):
+                for subject in self.index.subjects(department, semester):
+                    path = (department, semester, subject)
+                    subject_file = self.index.subject_file(*path)
+                    if subject_file is None:
+                        continue
+                    paths[subject_file['id']] = path
+                    if self.search_index.indexed_version(path) != subject_version(subject_file):
+                        stale.append((path, subject_file))
+        self._paths = paths
+
+        current = set(paths.values())
+        for path in self.search_index.subjects():
+            if path not in current:
+                self.search_index.remove_subject(path)
+
+        indexed = 0
+        pending = []
+        for path, subject_file in stale:
+            if self._stop.is_set():
+                break
+            if self.backfill is not None and not (self.cached is not None and self.cached(subject_file)):
+                pending.append(path)
+            elif self._index(path, subject_file):
+                indexed += 1
+        self._pending = pending
+        if indexed:
+            logger.info(f"Search index updated: {indexed} subjects, {self.search_index.stats()}")
+        return indexed
+
+    def _backfill_next(self):
+        path = self._pending.pop(0)
+        subject_file = self.index.subject_file(*path)
+        if subject_file is not None and self.search_index.indexed_version(path) != subject_version(subject_file):
+            self._index(path, subject_file)
+        if not self._pending:
+            logger.info(f"Search index backfilled: {self.search_index.stats()}")
+
+    def _add(self, subject_file: Dict, subject: Subject):
+        path = self._paths.get(subject_file['id'])
+        # A file the last sync didn't see is picked up from memory by the next one
+        if path is not None and self.search_index.indexed_version(path) != subject_version(subject_file):
+            self.search_index.add_subject(path, subject_version(subject_file), subject)
+
+    def _index(self, path: SubjectPath, subject_file: Dict) -> bool:
+        try:
+            self.search_index.add_subject(path, subject_version(subject_file), self.load(subject_file))
+            return True
+        except Exception as e:
+            logger.error(f"Error indexing {'/'.join(path)}: {str(e)}")
+            return False
@@ -0,0 +1,245 @@
+import logging
+import os
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Callable, ContextManager, Dict, List, Optional
+
+from googleapiclient.http import MediaIoBaseDownload
+
+from fake_drive import FakeDriveService
+import telemetry
+from rate_limit import Backoff
+
+logger = logging.getLogger(__name__)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# progress(bytes_done, total_bytes); total is None when not known yet
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DriveError(Exception):
+    """Google Drive could not be read"""
+
+
+class FileTooLargeError(Exception):
+    """A subject file exceeds the configured download limit"""
+
+    def __init__(self, file_id: str, max_bytes: int):
+        super().__init__(f"File {file_id} is larger than {max_bytes} bytes")
+        self.file_id = file_id
+        self.max_bytes = max_bytes
+
+
+def check_size(file_id: str, size: Optional[int], max_bytes: Optional[int]):
+    if max_bytes is not None and size is not None and size > max_bytes:
+        raise FileTooLargeError(file_id, max_bytes)
+
+
+class ContentBackend:
+    """Source of the department/semester/subject.json tree.
+
+    ``list_tree`` returns a flat list of Drive-shaped file records
+    (``id``, ``name``, ``mimeType``, ``parents``, ``modifiedTime``,
+    ``md5Checksum``) rooted at ``root_id``; ``get_file_content`` returns the
+    raw bytes of one file, refusing files over ``max_bytes`` and reporting
+    progress through ``progress`` as it goes. ``remote`` tells callers whether keeping a local
+    disk copy is worthwhile, and ``service`` is a Drive-v3-shaped client for
+    the changes feed, or None when the backend has no such feed.
+    ``open_subject`` may return an already decoded subject when the backend
+    can build one more cheaply than parsing the file.
+    """
+
+    root_id: str
+    remote = True
+    service = None
+
+    def list_tree(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def get_file_content(self, file_id: str, max_bytes: Optional[int] = None,
+                         progress: Optional[ProgressCallback] = None) -> bytes:
+        raise NotImplementedError
+
+    def open_subject(self, file_id: str) -> Optional[Dict]:
+        return None
+
+
+class _BoundedBuffer:
+    """Write target for ``MediaIoBaseDownload`` that refuses to grow past ``max_bytes``"""
+
+    def __init__(self, file_id: str, max_bytes: Optional[int]):
+        self.file_id = file_id
+        self.max_bytes = max_bytes
+        self.data = bytearray()
+
+    def write(self, chunk: bytes):
+        check_size(self.file_id, len(self.data) + len(chunk), self.max_bytes)
+        self.data += chunk
+
+
+class DriveBackend(ContentBackend):
+    """Google Drive, through a ``googleapiclient`` Drive v3 service.
+
+    The service's own ``httplib2.Http`` is not thread-safe, so callers that
+    load from several threads pass ``connection`` (e.g.
+    ``DriveClientManager.connection``), a context manager checking a
+    connection out of a pool; each request attempt and each download runs on
+    one checked-out connection.
+
+    Files are downloaded in ``chunk_size`` ranges. Every request and chunk
+    goes through ``backoff``: it takes a token from the shared limiter, and on
+    rate limiting or a transient error is retried with jittered exponential
+    backoff, a download resuming where it left off. Without a ``backoff``
+    there is no limiter and ``num_retries`` retries.
+    """
+
+    def __init__(self, service, root_id: str, connection: Optional[Callable[[], ContextManager]] = None,
+                 chunk_size: int = 1024 * 1024, num_retries: int = 3,
+                 backoff: Optional[Backoff] = None):
+        self.service = service
+        self.root_id = root_id
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.num_retries = num_retries
+        self.backoff = backoff or Backoff(max_retries=num_retries)
+
+    def execute(self, request):
+        with telemetry.span('drive.request', method=getattr(request, 'methodId', None)):
+            if self.connection is None:
+                return self.backoff.call(request.execute)
+            return self.backoff.call(lambda: self._execute_on_connection(request))
+
+    def _execute_on_connection(self, request):
+        # Checked out per attempt, so a backoff sleep doesn't hold a connection
+        with self.connection() as http:
+            return request.execute(http=http)
+
+    def list_tree(self) -> List[Dict]:
+        """List every folder and file visible to the service account, with parents"""
+        return self._list("trashed = false", "id, name, mimeType, parents, modifiedTime, md5Checksum")
+
+    def _list(self, q: str, file_fields: str) -> List[Dict]:
+        try:
+            files = []
+            page_token = None
+            while True:
+                results = self.execute(self.service.files().list(
+                    q=q,
+                    fields=f"nextPageToken, files({file_fields})",
+                    pageSize=1000,
+                    pageToken=page_token
+                ))
+                files.extend(results.get('files', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    return files
+        except Exception as e:
+            logger.error(f"Error listing Drive folder: {str(e)}")
+            raise DriveError("Error accessing Google Drive") from e
+
+    def get_file_content(self, file_id: str, max_bytes: Optional[int] = None,
+                         progress: Optional[ProgressCallback] = None) -> bytes:
+        """Get content of a file from Google Drive, streamed in chunks.
+
+        Returns a ``bytearray`` holding the chunks as they arrived, which every
+        decoder accepts as-is.
+        """
+        with (self.connection() if self.connection is not None else nullcontext()) as http, \
+                telemetry.span('drive.download', file_id=file_id):
+            request = self.service.files().get_media(fileId=file_id)
+            if http is not None:
+                # Every chunk of this download goes over the checked-out connection
+                request.http = http
+            buffer = _BoundedBuffer(file_id, max_bytes)
+            downloader = MediaIoBaseDownload(buffer, request, chunksize=self.chunk_size)
+            done = False
+            while not done:
+                status, done = self.backoff.call(downloader.next_chunk)
+                # The first chunk tells us the full size; stop before fetching the rest
+                check_size(file_id, status.total_size, max_bytes)
+                if progress is not None:
+                    progress(status.resumable_progress, status.total_size)
+        telemetry.count('drive.download_bytes', len(buffer.data))
+        return buffer.data
+
+
+class FakeDriveBackend(DriveBackend):
+    """Drive backend over an in-process ``FakeDriveService``.
+
+    ``latency`` seconds are added to every Drive call, so the app can be run
+    and benchmarked offline with realistic round-trip costs. ``from_directory``
+    seeds the fake from a local dept/semester/subject.json tree.
+    """
+
+    def __init__(self, service: Optional[FakeDriveService] = None, root_id: str = 'root', latency: float = 0,
+                 backoff: Optional[Backoff] = None):
+        service = service or FakeDriveService()
+        service.latency = latency
+        if root_id not in service._files:
+            service.add_folder('root', file_id=root_id)
+        super().__init__(service, root_id, backoff=backoff)
+
+    def get_file_content(self, file_id: str, max_bytes: Optional[int] = None,
+                         progress: Optional[ProgressCallback] = None) -> bytes:
+        content = self.execute(self.service.files().get_media(fileId=file_id))
+        check_size(file_id, len(content), max_bytes)
+        if progress is not None:
+            progress(len(content), len(content))
+        return content
+
+    @classmethod
+    def from_directory(cls, path: str, latency: float = 0, backoff: Optional[Backoff] = None) -> 'FakeDriveBackend':
+        backend = cls(backoff=backoff)
+        backend.service.load_directory(path, backend.root_id)
+        backend.service.latency = latency
+        return backend
+
+
+class LocalBackend(ContentBackend):
+    """A local mirror laid out as ``<root>/<department>/<semester>/<subject>.json``.
+
+    File ids are paths relative to the root, so reads go straight to disk.
+    """
+
+    remote = False
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.root_id = ''
+
+    def list_tree(self) -> List[Dict]:
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            parent = os.path.relpath(dirpath, self.root)
+            parent = '' if parent == '.' else parent
+            for name in dirnames:
+                files.append(self._record(os.path.join(parent, name), name, FOLDER_MIME_TYPE, parent))
+            for name in filenames:
+                if name.endswith('.json'):
+                    files.append(self._record(os.path.join(parent, name), name, 'application/json', parent))
+        return files
+
+    def _record(self, file_id: str, name: str, mime_type: str, parent: str) -> Dict:
+        stat = os.stat(os.path.join(self.root, file_id))
+        return {
+            'id': file_id,
+            'name': name,
+            'mimeType': mime_type,
+            'parents': [parent],
+            # No md5 here: hashing every file on each listing would defeat the point
+            'modifiedTime': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            'md5Checksum': None,
+        }
+
+    def get_file_content(self, file_id: str, max_bytes: Optional[int] = None,
+                         progress: Optional[ProgressCallback] = None) -> bytes:
+        path = os.path.normpath(os.path.join(self.root, file_id))
+        if not path.startswith(self.root + os.sep):
+            raise FileNotFoundError(file_id)
+        check_size(file_id, os.path.getsize(path), max_bytes)
+        with open(path, 'rb') as f:
+            content = f.read()
+        if progress is not None:
+            progress(len(content), len(content))
+        return content
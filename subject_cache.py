@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class SubjectCache:
+    """Thread-safe LRU cache of parsed subjects with a byte budget and TTL.
+
+    Entries are charged by the size of the raw JSON they were parsed from,
+    which keeps accounting cheap and roughly proportional to resident memory.
+    An entry is dropped when it is older than ``ttl`` seconds or when the
+    caller presents a Drive ``modifiedTime`` different from the one stored.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl: float = 3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, modified_time: Optional[str] = None) -> Optional[Any]:
+        """Return the cached value, or None if missing, expired or out of date"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                time.monotonic() - entry['stored_at'] > self.ttl
+                or (modified_time is not None and entry['modifiedTime'] != modified_time)
+            ):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def contains(self, key: str, modified_time: Optional[str] = None) -> bool:
+        """Whether a current entry exists, without touching LRU order or counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry['stored_at'] <= self.ttl and (
+                modified_time is None or entry['modifiedTime'] == modified_time
+            )
+
+    def put(self, key: str, value: Any, size: int, modified_time: Optional[str] = None):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = {
+                'value': value,
+                'size': size,
+                'modifiedTime': modified_time,
+                'stored_at': time.monotonic(),
+            }
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
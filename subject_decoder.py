@@ -0,0 +1,163 @@
+import json
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Groups: 1 string body, 2 colon (the string was a key), 3 opening bracket, 4 closing bracket
+_TOKEN = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"(\s*:)?|([\[{])|([\]}])')
+# Keys leading from the top-level object to the modules array
+_MODULES_PATH = [b'content', b'modules']
+
+
+def loads(raw: bytes) -> Any:
+    """Decode JSON bytes, with orjson when installed, without an intermediate str copy"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def decode_subject(raw: bytes, lazy_min_bytes: Optional[int] = None) -> Dict:
+    """Decode a subject file, deferring module topics for files of ``lazy_min_bytes`` or more.
+
+    A lazily decoded subject has the same shape as the plain one, except that
+    each ``content.modules`` entry is a ``LazyModule`` whose ``topics`` are only
+    decoded on first access. Files that do not look like a subject fall back
+    to a plain decode.
+    """
+    if lazy_min_bytes is None or len(raw) < lazy_min_bytes:
+        return loads(raw)
+    try:
+        return decode_lazily(raw)
+    except (ValueError, AttributeError, KeyError):
+        return loads(raw)
+
+
+def module_counts(module: Mapping) -> Tuple[int, int]:
+    """(topics, subtopics) of a module, without materializing a ``LazyModule``"""
+    if isinstance(module, LazyModule):
+        return module.topic_count, module.subtopic_count
+    topics = module.get("topics", [])
+    return len(topics), sum(len(topic.get("subtopics", [])) for topic in topics)
+
+
+def module_topics(module: Mapping) -> List:
+    """A module's topics, decoded without keeping them on a ``LazyModule`` that wasn't yet materialized"""
+    if isinstance(module, LazyModule) and not module.materialized:
+        start, end = module.topics_span
+        return loads(module._raw[start:end])
+    return module.get("topics", [])
+
+
+class LazyModule(Mapping):
+    """A module whose ``topics`` stay as raw JSON bytes until first read"""
+
+    __slots__ = ('_raw', '_topics_span', '_header', '_topics', 'topic_count', 'subtopic_count')
+
+    def __init__(self, raw: bytes, header: Dict, topics_span: Tuple[int, int], topic_count: int, subtopic_count: int):
+        self._raw = raw
+        self._header = header
+        self._topics_span = topics_span
+        self._topics: Optional[List] = None
+        self.topic_count = topic_count
+        self.subtopic_count = subtopic_count
+
+    @property
+    def materialized(self) -> bool:
+        return self._topics is not None
+
+    @property
+    def header(self) -> Dict:
+        """Every key of the module except ``topics``"""
+        return self._header
+
+    @property
+    def topics_span(self) -> Tuple[int, int]:
+        """Byte range of the ``topics`` array within the raw file"""
+        return self._topics_span
+
+    def __getitem__(self, key):
+        if key == 'topics':
+            if self._topics is None:
+                start, end = self._topics_span
+                self._topics = loads(self._raw[start:end])
+            return self._topics
+        return self._header[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._header
+        yield 'topics'
+
+    def __len__(self) -> int:
+        return len(self._header) + 1
+
+
+def decode_lazily(raw: bytes) -> Dict:
+    """Decode a subject with every module's topics deferred; ValueError if it is not a subject"""
+    modules, scanned = _scan_subject(raw)
+    if modules is None:
+        raise ValueError("not a subject file")
+
+    lazy_modules = []
+    for module_start, module_end, topics, topic_count, subtopic_count in scanned:
+        if topics is None:
+            lazy_modules.append(loads(raw[module_start:module_end]))
+            continue
+        header = loads(raw[module_start:topics[0]] + b'null' + raw[topics[1]:module_end])
+        del header['topics']
+        lazy_modules.append(LazyModule(raw, header, topics, topic_count, subtopic_count))
+
+    data = loads(raw[:modules[0]] + b'[]' + raw[modules[1]:])
+    data['content']['modules'] = lazy_modules
+    return data
+
+
+def _scan_subject(raw: bytes) -> Tuple[Optional[Tuple[int, int]], List[Tuple]]:
+    """One pass over the file, finding ``content.modules`` and each module's topics span and counts.
+
+    Only strings and brackets are visited, so HTML text is skipped a whole
+    string at a time. ``path`` holds the key each open container was found
+    under (``[None, b'content', b'modules', None, b'topics', ...]`` inside a
+    topic), which is all that is needed to tell modules, topics and
+    subtopics apart from same-named keys elsewhere in the file.
+    """
+    modules_span = None
+    modules = []
+    path: List[Optional[bytes]] = []
+    key = None
+    for m in _TOKEN.finditer(raw):
+        kind = m.lastindex
+        if kind == 2:
+            key = m.group(1)
+            continue
+        if kind == 3:
+            depth = len(path)
+            in_modules = depth >= 3 and path[1:3] == _MODULES_PATH
+            if depth == 2 and key == b'modules' and path[1] == b'content':
+                modules_start = m.start()
+            elif depth == 3 and in_modules:
+                module = [m.start(), None, None, 0, 0]
+            elif depth == 4 and key == b'topics' and in_modules:
+                topics_start = m.start()
+            elif depth == 5 and path[4] == b'topics' and in_modules:
+                module[3] += 1
+            elif depth == 7 and path[6] == b'subtopics' and path[4] == b'topics' and in_modules:
+                module[4] += 1
+            path.append(key)
+        elif kind == 4:
+            closed = path.pop()
+            depth = len(path)
+            in_modules = depth >= 3 and path[1:3] == _MODULES_PATH
+            if depth == 2 and closed == b'modules' and path[1] == b'content':
+                modules_span = (modules_start, m.end())
+            elif depth == 3 and in_modules:
+                module[1] = m.end()
+                modules.append(tuple(module))
+            elif depth == 4 and closed == b'topics' and in_modules:
+                module[2] = (topics_start, m.end())
+        key = None
+    return modules_span, modules
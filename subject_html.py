@@ -0,0 +1,124 @@
+from typing import List, Optional, Sequence, Tuple
+
+from subject_model import Module, Subject, Topic
+
+# A compiled block is either ('html', markup) or ('diagrams', [(title_markup, url), ...]),
+# the latter being one row of up to three images rendered with st.columns/st.image.
+Block = Tuple[str, object]
+
+DIAGRAMS_PER_ROW = 3
+# Markup around each topic or subtopic card, for sizing modules before their topics are compiled
+CARD_MARKUP_BYTES = 400
+
+
+def _plural(count: int, word: str) -> str:
+    return f"{count} {word}{'s' if count != 1 else ''}"
+
+
+def _diagram_rows(diagrams: Sequence[str], label: str) -> List[Block]:
+    rows = []
+    for i in range(0, len(diagrams), DIAGRAMS_PER_ROW):
+        batch = diagrams[i:i + DIAGRAMS_PER_ROW]
+        rows.append(('diagrams', [
+            (f"""
+            <div class="image-item">
+                <div class="image-title">{label} {idx}</div>
+            </div>
+            """, url)
+            for idx, url in enumerate(batch, i + 1)
+        ]))
+    return rows
+
+
+def compile_topic(topic_idx: int, topic: Topic) -> List[Block]:
+    """Blocks for one topic card, its text, diagrams and subtopics"""
+    blocks: List[Block] = [('html', f"""
+            <div class="content-card topic-card">
+                <div class="topic-title">
+                    <div class="topic-number">{topic_idx}</div>
+                    {topic.title}
+                </div>
+            </div>
+            """)]
+
+    if topic.text:
+        blocks.append(('html', f'<div class="content-text" style="margin-left: 1rem; margin-bottom: 1rem;">{topic.text}</div>'))
+    blocks.extend(_diagram_rows(topic.diagrams, "📊 Topic Diagram"))
+
+    for subtopic_idx, subtopic in enumerate(topic.subtopics, 1):
+        blocks.append(('html', f"""
+                <div class="content-card subtopic-card">
+                    <div class="subtopic-title">
+                        <div class="subtopic-number">{subtopic_idx}</div>
+                        {subtopic.title}
+                    </div>
+                </div>
+                """))
+        if subtopic.text:
+            blocks.append(('html', f'<div class="content-text" style="margin-left: 2rem; margin-bottom: 1rem;">{subtopic.text}</div>'))
+        blocks.extend(_diagram_rows(subtopic.diagrams, "📈 Subtopic Diagram"))
+    return blocks
+
+
+class CompiledModule:
+    """Ready-to-send markup for one module; topic blocks are compiled on first use"""
+
+    __slots__ = ('module_id', 'number', 'header_html', 'topic_count', 'subtopic_count', 'nbytes', '_module', '_topics')
+
+    def __init__(self, module: Module):
+        self.number = module.number
+        self.module_id = f"module_{self.number}"
+        self.topic_count, self.subtopic_count = module.topic_count, module.subtopic_count
+        self.header_html = f"""
+        <div class="content-card module-card" id="{self.module_id}">
+            <div class="module-header">
+                <div class="module-title">
+                    <div class="module-number">M{self.number}</div>
+                    {module.title}
+                </div>
+            </div>
+            <div class="module-summary">
+                📚 {_plural(self.topic_count, 'topic')} •
+                📋 {_plural(self.subtopic_count, 'subtopic')}
+            </div>
+        </div>
+        """
+        # Estimated size once every topic is compiled, so caches can charge for it up front
+        cards = self.topic_count + self.subtopic_count
+        self.nbytes = len(self.header_html) + module.content_bytes + cards * CARD_MARKUP_BYTES
+        self._module: Optional[Module] = module
+        self._topics: Optional[List[List[Block]]] = None
+
+    @property
+    def topics(self) -> List[List[Block]]:
+        if self._topics is None:
+            # read_topics and dropping the module: once compiled, the parsed records aren't needed here
+            self._topics = [compile_topic(idx, topic) for idx, topic in enumerate(self._module.read_topics(), 1)]
+            self._module = None
+        return self._topics
+
+
+class CompiledSubject:
+    """Stats card markup and compiled modules for one version of a subject file"""
+
+    def __init__(self, subject: Subject):
+        self.modules = [CompiledModule(module) for module in subject.modules]
+        self.total_topics = subject.topic_count
+        self.total_subtopics = subject.subtopic_count
+        self.stat_cards = [
+            f"""
+        <div class="stat-card">
+            <div class="stat-number">{number}</div>
+            <div class="stat-label">{label}</div>
+        </div>
+        """
+            for number, label in (
+                (len(self.modules), "Modules"),
+                (self.total_topics, "Topics"),
+                (self.total_subtopics, "Subtopics"),
+            )
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(module.nbytes for module in self.modules) + sum(len(card) for card in self.stat_cards)
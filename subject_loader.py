@@ -0,0 +1,167 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import telemetry
+from disk_store import DiskStore
+from rate_limit import SingleFlight
+from drive_index import DriveIndex
+from storage import ContentBackend, ProgressCallback
+from subject_cache import SubjectCache
+from subject_decoder import decode_subject
+from subject_model import Subject
+from warm_cache import CompressedCache
+
+logger = logging.getLogger(__name__)
+
+
+class SubjectLoader:
+    """Resolves and loads subjects through memory cache → disk store → backend.
+
+    Subjects are returned (and cached) as ``subject_model.Subject`` records.
+    With a ``warm`` tier, every file read is also kept compressed in memory,
+    and the parsed (hot) cache only takes subjects accessed at least
+    ``hot_min_hits`` times recently, so a one-off or prefetched subject costs
+    its compressed size rather than its parsed size.
+
+    One instance is shared by every session; warming the cache ahead of
+    readers is ``prefetch.SpeculativePrefetcher``'s job. Files of
+    ``lazy_min_bytes`` or more are decoded lazily, one module's topics at a
+    time (see ``subject_decoder``), and files over ``max_file_bytes`` are
+    refused mid-download. Concurrent misses for the same file version share a
+    single fetch. ``on_load``, when set, is called with the file and subject
+    after every decode, e.g. to index subjects as readers fill the cache.
+    """
+
+    def __init__(self, backend: ContentBackend, index: DriveIndex, cache: SubjectCache,
+                 disk_store: Optional[DiskStore] = None, lazy_min_bytes: Optional[int] = None,
+                 max_file_bytes: Optional[int] = None,
+                 warm: Optional[CompressedCache] = None, hot_min_hits: int = 2):
+        self.backend = backend
+        self.index = index
+        self.cache = cache
+        self.disk_store = disk_store if backend.remote else None
+        self.warm = warm
+        self.hot_min_hits = hot_min_hits
+        self.lazy_min_bytes = lazy_min_bytes
+        self.max_file_bytes = max_file_bytes
+        self._flights = SingleFlight()
+        # (file id, modifiedTime) -> (bytes done, total) of downloads in flight
+        self._progress: Dict[Tuple[str, str], Tuple[int, Optional[int]]] = {}
+        self.on_load: Optional[Callable[[Dict, Subject], None]] = None
+
+    def load(self, department: str, semester: str, subject: str,
+             progress: Optional[ProgressCallback] = None) -> Subject:
+        subject_file = self.index.subject_file(department, semester, subject)
+        if subject_file is None:
+            raise KeyError(f"{department}/{semester}/{subject}")
+        return self.load_file(subject_file, progress)
+
+    def load_file(self, subject_file: Dict, progress: Optional[ProgressCallback] = None,
+                  record: bool = True) -> Subject:
+        """Load a subject; ``record=False`` for background reads that shouldn't count as a view"""
+        # Bundle-backed subjects come straight off the mapped file; the OS page cache holds them
+        data = self.backend.open_subject(subject_file['id'])
+        if data is not None:
+            return Subject.from_dict(data)
+
+        promote = self.record(subject_file) if record else self.warm is None
+        subject = self.cache.get(subject_file['id'], subject_file['modifiedTime'])
+        if subject is not None:
+            telemetry.count('cache.hot.hits')
+            return subject
+        telemetry.count('cache.hot.misses')
+        key = (subject_file['id'], subject_file['modifiedTime'])
+        if progress is None:
+            return self._flights.do(key, lambda: self._load_uncached(subject_file, None, promote))
+
+        # progress belongs to one reader's session and may raise that session's rerun, so the
+        # shared download only publishes its progress, and each waiter relays it in its own thread
+        def publish(done: int, total: Optional[int]):
+            self._progress[key] = (done, total)
+
+        def load() -> Subject:
+            try:
+                return self._load_uncached(subject_file, publish, promote)
+            finally:
+                self._progress.pop(key, None)
+
+        def relay():
+            done, total = self._progress.get(key, (0, None))
+            if done:
+                progress(done, total)
+        return self._flights.do(key, load, tick=relay)
+
+    def _load_uncached(self, subject_file: Dict, progress: Optional[ProgressCallback], promote: bool) -> Subject:
+        # The previous flight for this key may have filled the cache just before we started ours
+        subject = self.cache.get(subject_file['id'], subject_file['modifiedTime'])
+        if subject is not None:
+            return subject
+        file_content = self.read_bytes(subject_file, progress)
+        with telemetry.span('subject.decode', file_id=subject_file['id'], bytes=len(file_content)):
+            subject = Subject.from_dict(decode_subject(file_content, self.lazy_min_bytes))
+        if promote:
+            self.cache.put(subject_file['id'], subject, len(file_content), subject_file['modifiedTime'])
+        if self.on_load is not None:
+            try:
+                self.on_load(subject_file, subject)
+            except Exception as e:
+                logger.error(f"Error in load hook for {subject_file['id']}: {str(e)}")
+        return subject
+
+    def record(self, subject_file: Dict) -> bool:
+        """Count one read, including one served from elsewhere (e.g. compiled markup); returns ``is_hot``"""
+        if self.warm is not None:
+            self.warm.frequency.record(subject_file['id'])
+        return self.is_hot(subject_file)
+
+    def is_hot(self, subject_file: Dict) -> bool:
+        """Whether a subject is read often enough to keep parsed in memory"""
+        return self.warm is None or self.warm.frequency.count(subject_file['id']) >= self.hot_min_hits
+
+    def contains(self, subject_file: Dict) -> bool:
+        """Whether a subject is already held in memory, parsed or compressed"""
+        return self.cache.contains(subject_file['id'], subject_file['modifiedTime']) or (
+            self.warm is not None and self.warm.contains(subject_file['id'], subject_file['modifiedTime'])
+        )
+
+    def peek_file(self, subject_file: Dict) -> Subject:
+        """Subject from memory if present, else read without making it hot"""
+        if self.warm is None and not self.cache.contains(subject_file['id'], subject_file['modifiedTime']):
+            return self._load_uncached(subject_file, None, promote=False)
+        return self.load_file(subject_file, record=False)
+
+    def read_bytes(self, subject_file: Dict, progress: Optional[ProgressCallback] = None) -> bytes:
+        """Raw file bytes from the warm tier, else from disk or the backend (and kept warm)"""
+        if self.warm is not None:
+            file_content = self.warm.get(subject_file['id'], subject_file['modifiedTime'])
+            if file_content is not None:
+                telemetry.count('cache.warm.hits')
+                return file_content
+            telemetry.count('cache.warm.misses')
+        file_content = self.fetch_bytes(subject_file, progress)
+        if self.warm is not None:
+            self.warm.put(subject_file['id'], file_content, subject_file['modifiedTime'])
+        return file_content
+
+    def fetch_bytes(self, subject_file: Dict, progress: Optional[ProgressCallback] = None) -> bytes:
+        """Raw file bytes from the disk store when still current, else from the backend"""
+        if self.disk_store is not None:
+            file_content = self.disk_store.get(subject_file['id'], subject_file['md5Checksum'], subject_file['modifiedTime'])
+            if file_content is not None:
+                telemetry.count('cache.disk.hits')
+                return file_content
+            telemetry.count('cache.disk.misses')
+        with telemetry.span('subject.fetch', file_id=subject_file['id']):
+            file_content = self.backend.get_file_content(subject_file['id'], self.max_file_bytes, progress)
+        if self.disk_store is not None:
+            self.disk_store.put(subject_file['id'], file_content, subject_file['md5Checksum'], subject_file['modifiedTime'])
+        return file_content
+
+    def invalidate(self, file_ids: List[str]):
+        """Drop cached copies of files reported changed, e.g. by the Drive changes feed"""
+        for file_id in file_ids:
+            self.cache.invalidate(file_id)
+            if self.warm is not None:
+                self.warm.invalidate(file_id)
+            if self.disk_store is not None:
+                self.disk_store.delete(file_id)
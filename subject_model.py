@@ -0,0 +1,126 @@
+import sys
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple
+
+from subject_decoder import LazyModule, module_counts, module_topics
+
+
+def _content(entry: Mapping) -> Tuple[str, Tuple[str, ...]]:
+    """(text, diagram URLs) of a topic or subtopic ``content`` object"""
+    content = entry.get("content") or {}
+    # The same diagram is often linked from several places; keep one copy of its URL
+    return content.get("text", "") or "", tuple(sys.intern(url) for url in content.get("diagrams", []))
+
+
+class Subtopic:
+    __slots__ = ('title', 'text', 'diagrams')
+
+    def __init__(self, title: str, text: str, diagrams: Tuple[str, ...]):
+        self.title = title
+        self.text = text
+        self.diagrams = diagrams
+
+    @classmethod
+    def from_dict(cls, subtopic: Mapping) -> 'Subtopic':
+        return cls(subtopic['subtopic_title'], *_content(subtopic))
+
+    def to_dict(self) -> Dict:
+        return {"subtopic_title": self.title, "content": {"text": self.text, "diagrams": list(self.diagrams)}}
+
+
+class Topic:
+    __slots__ = ('title', 'text', 'diagrams', 'subtopics')
+
+    def __init__(self, title: str, text: str, diagrams: Tuple[str, ...], subtopics: Tuple[Subtopic, ...]):
+        self.title = title
+        self.text = text
+        self.diagrams = diagrams
+        self.subtopics = subtopics
+
+    @classmethod
+    def from_dict(cls, topic: Mapping) -> 'Topic':
+        subtopics = tuple(Subtopic.from_dict(subtopic) for subtopic in topic.get("subtopics", []))
+        return cls(topic['topic_title'], *_content(topic), subtopics)
+
+    def to_dict(self) -> Dict:
+        return {
+            "topic_title": self.title,
+            "content": {"text": self.text, "diagrams": list(self.diagrams)},
+            "subtopics": [subtopic.to_dict() for subtopic in self.subtopics],
+        }
+
+
+class Module:
+    """A module's title and counts; its topics are converted on first use.
+
+    For a lazily decoded module (see ``subject_decoder.LazyModule``) the
+    topics stay as raw JSON until then, so collapsed modules of large
+    subjects cost only their header.
+    """
+
+    __slots__ = ('number', 'title', 'topic_count', 'subtopic_count', '_source', '_topics')
+
+    def __init__(self, module: Mapping):
+        self.number = module['module_number']
+        self.title = module['module_title']
+        self.topic_count, self.subtopic_count = module_counts(module)
+        if isinstance(module, LazyModule):
+            self._source: Optional[LazyModule] = module
+            self._topics: Optional[Tuple[Topic, ...]] = None
+        else:
+            # Don't hold on to the decoded dicts
+            self._source = None
+            self._topics = tuple(Topic.from_dict(topic) for topic in module.get("topics", []))
+
+    @property
+    def topics(self) -> Tuple[Topic, ...]:
+        if self._topics is None:
+            self._topics = self._convert()
+        return self._topics
+
+    def read_topics(self) -> Tuple[Topic, ...]:
+        """The topics, without keeping them on this module if they weren't converted yet"""
+        return self._topics if self._topics is not None else self._convert()
+
+    @property
+    def content_bytes(self) -> int:
+        """Rough size of the topics' titles and text, without converting them"""
+        if self._topics is None:
+            start, end = self._source.topics_span
+            return end - start
+        return sum(
+            len(topic.title) + len(topic.text) + sum(len(s.title) + len(s.text) for s in topic.subtopics)
+            for topic in self._topics
+        )
+
+    def to_dict(self) -> Dict:
+        """The module in the subject file schema"""
+        return {
+            "module_number": self.number,
+            "module_title": self.title,
+            "topics": [topic.to_dict() for topic in self.read_topics()],
+        }
+
+    def _convert(self) -> Tuple[Topic, ...]:
+        return tuple(Topic.from_dict(topic) for topic in module_topics(self._source))
+
+
+class Subject:
+    """Slotted records for one subject file, with counts computed once"""
+
+    __slots__ = ('name', 'modules', 'topic_count', 'subtopic_count')
+
+    def __init__(self, name: Optional[str], modules: List[Module]):
+        self.name = name
+        self.modules = modules
+        self.topic_count = sum(module.topic_count for module in modules)
+        self.subtopic_count = sum(module.subtopic_count for module in modules)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subject':
+        modules = data.get("content", {}).get("modules", [])
+        return cls(data.get("subject"), [Module(module) for module in modules])
+
+    def to_dict(self) -> Dict:
+        """The subject in the subject file schema, less any fields the records don't keep"""
+        return {"subject": self.name, "content": {"modules": [module.to_dict() for module in self.modules]}}
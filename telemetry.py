@@ -0,0 +1,177 @@
+"""Spans, counters and histograms for the app's hot paths.
+
+Everything is off until ``configure(enabled=True)``; until then ``span``
+returns a shared no-op context manager and ``count``/``observe`` return at
+once, so instrumented code pays one global lookup per call.
+
+When enabled, each span is logged as one JSON line on the ``telemetry``
+logger, tagged with whatever ``tagged`` or ``set_tags`` put in the current context (e.g. the
+department, semester and subject being rendered), and its duration goes into
+a histogram. Metrics are served in the Prometheus text format at
+``http://127.0.0.1:<port>/metrics``.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('telemetry')
+
+# Seconds; covers a cached rerun (a few ms) up to a slow cold Drive download
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_enabled = False
+_NOOP = nullcontext()
+_tags: ContextVar[Dict[str, str]] = ContextVar('telemetry_tags', default={})
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+# name -> [bucket counts..., +Inf count], sum
+_histograms: Dict[str, Tuple[List[int], List[float]]] = {}
+_gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def configure(enabled: bool, port: Optional[int] = None):
+    """Turn instrumentation on or off, serving /metrics on ``port`` if given"""
+    global _enabled, _server
+    _enabled = enabled
+    if not enabled or not port or _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+    except OSError as e:
+        # Another worker process on this host already serves the port
+        logger.error(f"Error starting metrics endpoint on port {port}: {str(e)}")
+        return
+    threading.Thread(target=_server.serve_forever, name='metrics-endpoint', daemon=True).start()
+    logger.info(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+
+
+@contextmanager
+def tagged(**tags: str):
+    """Add tags to every span started in this context"""
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def set_tags(**tags: str):
+    """Replace the current context's tags, e.g. once per script run"""
+    _tags.set(tags)
+
+
+def span(name: str, **tags):
+    """Time a block as ``name``; a block that raises is counted in ``<name>.errors``"""
+    if not _enabled:
+        return _NOOP
+    return _span(name, tags)
+
+
+@contextmanager
+def _span(name: str, tags: Dict):
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe(name, duration)
+        if error is not None:
+            count(f"{name}.errors")
+        record = {'span': name, 'ms': round(duration * 1000, 3), **_tags.get(), **tags}
+        if error is not None:
+            record['error'] = error
+        logger.info(json.dumps(record, default=str))
+
+
+def count(name: str, value: float = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float):
+    """Add one observation to the ``name`` latency histogram"""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = ([0] * (len(BUCKETS) + 1), [0.0])
+        histogram[0][bisect_left(BUCKETS, seconds)] += 1
+        histogram[1][0] += seconds
+
+
+def register_gauges(prefix: str, read: Callable[[], Dict[str, float]]):
+    """Export ``read()``'s numeric values as ``<prefix>_<key>`` gauges, read at scrape time"""
+    with _lock:
+        _gauges[prefix] = read
+
+
+def snapshot() -> Dict:
+    """Current counters, histograms (bucket counts, sum) and gauge values"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: (list(buckets), total[0]) for name, (buckets, total) in _histograms.items()}
+        gauges = dict(_gauges)
+    gauge_values = {}
+    for prefix, read in gauges.items():
+        try:
+            values = read()
+        except Exception as e:
+            logger.error(f"Error reading {prefix} gauges: {str(e)}")
+            continue
+        gauge_values.update({f"{prefix}.{key}": value for key, value in values.items()
+                             if isinstance(value, (int, float))})
+    return {'counters': counters, 'histograms': histograms, 'gauges': gauge_values}
+
+
+def _metric_name(name: str) -> str:
+    return 'ktu_' + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def render_prometheus() -> str:
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data['counters'].items()):
+        metric = _metric_name(name) + '_total'
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(data['gauges'].items()):
+        metric = _metric_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    for name, (buckets, total) in sorted(data['histograms'].items()):
+        metric = _metric_name(name) + '_seconds'
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS + ('+Inf',), buckets):
+            cumulative += bucket
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"{metric}_sum {total}", f"{metric}_count {cumulative}"]
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
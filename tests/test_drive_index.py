@@ -0,0 +1,62 @@
+import threading
+import time
+
+from drive_index import FOLDER_MIME_TYPE, DriveIndex
+
+
+def listing(*subjects):
+    folders = [
+        {'id': 'cse', 'name': 'CSE', 'mimeType': FOLDER_MIME_TYPE, 'parents': ['root']},
+        {'id': 's3', 'name': 'S3', 'mimeType': FOLDER_MIME_TYPE, 'parents': ['cse']},
+    ]
+    return folders + [
+        {'id': name, 'name': f"{name}.json", 'mimeType': 'application/json', 'parents': ['s3'],
+         'modifiedTime': '2024-01-01T00:00:00.000Z', 'md5Checksum': name}
+        for name in subjects
+    ]
+
+
+def test_expired_tree_is_served_while_one_thread_rebuilds_it():
+    release = threading.Event()
+    calls = []
+
+    def list_all():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(5)
+            return listing('DSA', 'OS')
+        return listing('DSA')
+    index = DriveIndex(list_all, 'root', ttl=0.05)
+    assert index.subjects('CSE', 'S3') == ['DSA']
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    for _ in range(10):
+        assert index.subjects('CSE', 'S3') == ['DSA']
+    assert time.monotonic() - start < 1
+    assert len(calls) == 2
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while index.subjects('CSE', 'S3') != ['DSA', 'OS'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.subjects('CSE', 'S3') == ['DSA', 'OS']
+
+
+def test_failed_rebuild_keeps_the_stale_tree():
+    calls = []
+
+    def list_all():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("Drive unavailable")
+        return listing('DSA')
+    index = DriveIndex(list_all, 'root', ttl=0.5)
+    index.departments()
+    time.sleep(0.6)
+    index.departments()
+    deadline = time.monotonic() + 5
+    while index._lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.subjects('CSE', 'S3') == ['DSA']
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from drive_index import DriveIndex
+from drive_sync import DriveChangesSyncer
+from fake_drive import FakeDriveService
+from storage import FakeDriveBackend
+from subject_cache import SubjectCache
+from subject_loader import SubjectLoader
+
+
+def subject_bytes(name: str, title: str) -> bytes:
+    module = {"module_number": 1, "module_title": title, "topics": []}
+    return json.dumps({"subject": name, "content": {"modules": [module]}}).encode()
+
+
+@pytest.fixture
+def drive():
+    # Two changes per page, so every poll below reads more than one page
+    service = FakeDriveService(page_size=2)
+    root = service.add_folder('root', file_id='root')
+    semester = service.add_folder('S3', service.add_folder('CSE', root))
+    files = {
+        name: service.add_file(f"{name}.json", subject_bytes(name, "Original"), semester)
+        for name in ('DSA', 'OS', 'DBMS')
+    }
+    backend = FakeDriveBackend(service, root)
+    index = DriveIndex(backend.list_tree, root, ttl=3600)
+    assert index.subjects('CSE', 'S3') == ['DBMS', 'DSA', 'OS']
+    loader = SubjectLoader(backend, index, SubjectCache())
+    invalidated = []
+
+    def on_change(file_ids):
+        invalidated.extend(file_ids)
+        loader.invalidate(file_ids)
+    syncer = DriveChangesSyncer(service, index, on_change=on_change)
+    assert syncer.poll() == []
+    return service, files, index, loader, syncer, invalidated
+
+
+def test_update_reloads_new_content(drive):
+    service, files, index, loader, syncer, invalidated = drive
+    assert loader.load('CSE', 'S3', 'DSA').modules[0].title == "Original"
+
+    service.update_file(files['DSA'], subject_bytes('DSA', "Edited"))
+    assert syncer.poll() == [files['DSA']]
+    assert invalidated == [files['DSA']]
+    assert loader.load('CSE', 'S3', 'DSA').modules[0].title == "Edited"
+
+
+def test_rename_moves_subject(drive):
+    service, files, index, loader, syncer, invalidated = drive
+    service.rename(files['OS'], 'Operating Systems.json')
+    syncer.poll()
+    assert index.subjects('CSE', 'S3') == ['DBMS', 'DSA', 'Operating Systems']
+    assert index.subject_file('CSE', 'S3', 'Operating Systems')['id'] == files['OS']
+
+
+def test_trash_drops_subject(drive):
+    service, files, index, loader, syncer, invalidated = drive
+    loader.load('CSE', 'S3', 'DBMS')
+    service.trash(files['DBMS'])
+    syncer.poll()
+    assert 'DBMS' not in index.subjects('CSE', 'S3')
+    assert not loader.contains({'id': files['DBMS'], 'modifiedTime': None})
+
+
+def test_changes_spanning_pages_are_applied_once(drive):
+    service, files, index, loader, syncer, invalidated = drive
+    service.update_file(files['DSA'], subject_bytes('DSA', "Edited"))
+    service.rename(files['OS'], 'Operating Systems.json')
+    service.trash(files['DBMS'])
+    assert sorted(syncer.poll()) == sorted(files.values())
+    assert index.subjects('CSE', 'S3') == ['DSA', 'Operating Systems']
+    assert syncer.poll() == []
+    assert service.calls['files.list'] == 1
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import SingleFlight
+
+CALLERS = 20
+
+
+def stampede(flight: SingleFlight, fn):
+    """Call ``flight.do('key', fn)`` from CALLERS threads at once; returns results and exceptions"""
+    barrier = threading.Barrier(CALLERS)
+    results, errors = [], []
+
+    def caller():
+        barrier.wait()
+        try:
+            results.append(flight.do('key', fn))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+    results, errors = stampede(flight, fetch)
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == CALLERS and all(result is results[0] for result in results)
+
+
+def test_concurrent_callers_share_the_exception():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("quota exceeded")
+    results, errors = stampede(flight, fetch)
+    assert not results
+    assert len(calls) == 1
+    assert len(errors) == CALLERS and all(isinstance(e, ValueError) for e in errors)
+
+
+def test_finished_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do('key', lambda: {}['missing'])
+    assert flight.do('key', lambda: 3) == 3
+
+
+class Rerun(BaseException):
+    """Stands in for Streamlit's RerunException, raised in the leader's session only"""
+
+
+def test_followers_retry_when_the_leader_is_interrupted():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(threading.current_thread())
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise Rerun()
+        return 'content'
+    results, errors = [], []
+
+    def caller():
+        try:
+            results.append(flight.do('key', fetch))
+        except Rerun as e:
+            errors.append(e)
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 1
+    assert results == ['content'] * 4
+    assert len(calls) == 2
+
+
+def test_ticking_callers_wait_in_their_own_threads():
+    flight = SingleFlight()
+    ticks = []
+    done = threading.Event()
+
+    def fetch():
+        done.wait(1)
+        return threading.current_thread()
+
+    def tick():
+        ticks.append(threading.current_thread())
+        done.set()
+    ran_on = flight.do('key', fetch, tick=tick, interval=0.01)
+    assert ran_on is not threading.current_thread()
+    assert ticks and all(thread is threading.current_thread() for thread in ticks)
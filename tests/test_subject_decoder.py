@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from benchmarks.curriculum import generate_subject
+from subject_decoder import LazyModule, decode_lazily, decode_subject, module_counts, module_topics
+from subject_model import Subject
+
+
+def plain(value):
+    """``value`` with every LazyModule turned into the dict it stands for"""
+    if isinstance(value, LazyModule):
+        return {key: plain(value[key]) for key in value}
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+
+def subject_with_decoys():
+    """A subject whose other keys reuse the names the scanner looks for"""
+    data = generate_subject("Decoys", modules=3, topics=2, subtopics=2, words=20)
+    data["meta"] = {"modules": [{"name": "x", "topics": [{"subtopics": [{}]}]}]}
+    data["modules"] = [{"topics": []}]
+    data["content"]["outline"] = {"modules": [{"module_number": 99, "topics": [1, 2]}]}
+    module = data["content"]["modules"][0]
+    module["extra"] = {"topics": [{"subtopics": [1]}], "modules": []}
+    module["topics"][0]["notes"] = {"subtopics": ["a", "b", "c"]}
+    # Keys after content, and escaped quotes and brackets inside strings
+    data["trailer"] = {"content": {"modules": [{"name": "y"}]}, "text": "a \"modules\": [ { ] } \\"}
+    return data
+
+
+@pytest.mark.parametrize("data", [
+    generate_subject("Plain", modules=4, topics=3, subtopics=2, words=20),
+    subject_with_decoys(),
+], ids=["plain", "decoys"])
+def test_lazy_decode_matches_plain_decode(data):
+    raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    assert plain(decode_lazily(raw)) == json.loads(raw)
+
+    lazy = decode_lazily(raw)
+    expected_modules = data["content"]["modules"]
+    assert len(lazy["content"]["modules"]) == len(expected_modules)
+    for module, expected in zip(lazy["content"]["modules"], expected_modules):
+        assert isinstance(module, LazyModule)
+        topics = expected["topics"]
+        assert module_counts(module) == (len(topics), sum(len(t["subtopics"]) for t in topics))
+        assert module_topics(module) == topics
+        assert not module.materialized
+
+    lazy_subject = Subject.from_dict(lazy)
+    plain_subject = Subject.from_dict(json.loads(raw))
+    assert lazy_subject.to_dict() == plain_subject.to_dict()
+    assert (lazy_subject.topic_count, lazy_subject.subtopic_count) == \
+        (plain_subject.topic_count, plain_subject.subtopic_count)
+
+
+def test_decode_subject_falls_back_for_non_subjects():
+    raw = json.dumps({"modules": [{"topics": []}]}).encode()
+    assert decode_subject(raw, lazy_min_bytes=0) == {"modules": [{"topics": []}]}
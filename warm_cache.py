@@ -0,0 +1,116 @@
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+
+class AccessFrequency:
+    """Approximate recent access counts per key.
+
+    Every ``window`` recorded accesses all counts are halved, so a subject
+    that was busy last week gives way to one that is busy now.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._recorded = 0
+
+    def record(self, key: str) -> int:
+        """Count one access and return the key's count"""
+        with self._lock:
+            self._counts[key] += 1
+            count = self._counts[key]
+            self._recorded += 1
+            if self._recorded >= self.window:
+                self._recorded = 0
+                self._counts = Counter({k: c // 2 for k, c in self._counts.items() if c > 1})
+            return count
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return self._counts[key]
+
+
+class CompressedCache:
+    """Warm tier: zlib-compressed raw subject files in memory, within ``max_bytes``.
+
+    Raw JSON compresses several times over, so this holds many more subjects
+    than the parsed tier in the same memory, at the cost of a decompress and
+    parse on each read. When full, the least frequently accessed entries (per
+    ``frequency``) are evicted first.
+    """
+
+    def __init__(self, frequency: AccessFrequency, max_bytes: int = 128 * 1024 * 1024, level: int = 6):
+        self.frequency = frequency
+        self.max_bytes = max_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        # file id -> (compressed bytes, modifiedTime, raw size)
+        self._entries: Dict[str, Tuple[bytes, Optional[str], int]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, modified_time: Optional[str] = None) -> Optional[bytes]:
+        """Decompressed raw file, or None if missing or out of date"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and modified_time is not None and entry[1] != modified_time:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return zlib.decompress(entry[0])
+
+    def contains(self, key: str, modified_time: Optional[str] = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (modified_time is None or entry[1] == modified_time)
+
+    def put(self, key: str, raw: bytes, modified_time: Optional[str] = None):
+        compressed = zlib.compress(raw, self.level)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(compressed) > self.max_bytes:
+                return
+            self._entries[key] = (compressed, modified_time, len(raw))
+            self._bytes += len(compressed)
+            if self._bytes > self.max_bytes:
+                self._evict(keep=key)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'raw_bytes': sum(entry[2] for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict(self, keep: str):
+        # Evict down to 90% so a full tier doesn't rank every entry on each put
+        target = self.max_bytes * 0.9
+        victims = sorted((k for k in self._entries if k != keep), key=self.frequency.count)
+        for victim in victims:
+            if self._bytes <= target:
+                break
+            self._remove(victim)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        compressed, _, _ = self._entries.pop(key)
+        self._bytes -= len(compressed)